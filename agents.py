@@ -1,27 +1,257 @@
-from groq_service import call_groq, parse_json_response
+from groq_service import call_groq, acall_groq, parse_json_response, model_router
+from json_parser import ContentStreamParser, CONTENT_FIELDS, extract_json
+from content_patch import serialize_content, apply_patch
+from platform_registry import platforms
 from storage import storage
+from cache import response_cache, make_cache_key, generate_flights
+from near_duplicates import near_duplicates
+from metrics import (
+    PARSE_LATENCY, PARSE_FAILURES, FALLBACK_CONTENT, GENERATE_COALESCED, CASCADE_ESCALATIONS,
+    PROVISIONAL_RESOLVED, NEAR_DUPLICATES
+)
+from config import (
+    PROMPT_VERSION, CHAT_MODE, CHAT_FULL_MAX_TOKENS, CHAT_PATCH_MAX_TOKENS,
+    GROQ_CASCADE, GROQ_CASCADE_MODELS, NEAR_DUP_MODE
+)
+import asyncio
+import time
 import uuid
 
+# Background completions of provisional sessions (referenced so they aren't collected)
+_background_tasks = set()
+
 class ContentAgent:
     def __init__(self, platform):
         self.platform = platform
+        self.spec = platforms[platform]
     
-    def generate_content(self, topic, audience, tone):
+    def generate_content(self, topic, audience, tone, use_cache=True):
         """Generate content for the platform"""
-        prompt = self._build_prompt(topic, audience, tone)
+        cache_key = self._cache_key(topic, audience, tone)
+        content_data = response_cache.get(cache_key) if use_cache else None
+        
+        if content_data is None:
+            # Identical requests already in flight share that call's content
+            content_data, shared = generate_flights.do(
+                cache_key, lambda: self._generate(topic, audience, tone, cache_key)
+            )
+            if shared:
+                GENERATE_COALESCED.labels(self.platform).inc()
+        
+        # Every caller still gets its own session
+        return self._create_session(topic, audience, tone, content_data)
+    
+    async def agenerate_content(self, topic, audience, tone, use_cache=True, lane=None):
+        """Async version of generate_content
+        
+        lane="bulk" queues the upstream call behind interactive traffic (it is
+        still routed, and cached, as a "generate" call).
+        """
+        cache_key = self._cache_key(topic, audience, tone)
+        content_data = response_cache.get(cache_key) if use_cache else None
+        
+        if content_data is None:
+            content_data, shared = await generate_flights.ado(
+                cache_key, lambda: self._agenerate(topic, audience, tone, cache_key, lane)
+            )
+            if shared:
+                GENERATE_COALESCED.labels(self.platform).inc()
+        
+        return self._create_session(topic, audience, tone, content_data)
+    
+    async def agenerate_within(self, topic, audience, tone, deadline, use_cache=True):
+        """agenerate_content with a latency budget of deadline seconds
+        
+        If Groq has not answered in time the session is created at once from
+        the fallback templates and flagged provisional; the real content
+        replaces it in the background when it arrives.
+        """
+        cache_key = self._cache_key(topic, audience, tone)
+        content_data = response_cache.get(cache_key) if use_cache else None
+        if content_data is not None:
+            return {**self._create_session(topic, audience, tone, content_data), "provisional": False}
+        
+        flight = asyncio.ensure_future(generate_flights.ado(
+            cache_key, lambda: self._agenerate(topic, audience, tone, cache_key)
+        ))
+        done, _ = await asyncio.wait({flight}, timeout=deadline)
+        if done:
+            content_data, shared = flight.result()
+            if shared:
+                GENERATE_COALESCED.labels(self.platform).inc()
+            return {**self._create_session(topic, audience, tone, content_data), "provisional": False}
+        
+        FALLBACK_CONTENT.labels(self.platform, "deadline").inc()
+        content_data = self._get_fallback_content(topic)
+        result = self._create_session(topic, audience, tone, content_data, provisional=True)
+        task = asyncio.ensure_future(self._complete_provisional(result["session_id"], content_data, flight))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+        return {**result, "provisional": True}
+    
+    async def _complete_provisional(self, session_id, provisional_content, flight):
+        """Write the late upstream result into a provisional session"""
+        try:
+            content_data, _ = await flight
+        except Exception as e:
+            print(f"Background generation for session {session_id} failed: {e}")
+            PROVISIONAL_RESOLVED.labels("failed").inc()
+            # Nothing will replace the template content any more
+            self._settle_provisional(session_id)
+            return
+        
+        session = storage.get_session(session_id)
+        # Keep the session as it is if the user already edited the provisional content
+        if not session or session["content"] != provisional_content:
+            PROVISIONAL_RESOLVED.labels("kept").inc()
+            self._settle_provisional(session_id)
+            return
+        storage.save_session(session_id, {**session, "content": content_data, "provisional": False})
+        PROVISIONAL_RESOLVED.labels("replaced").inc()
+    
+    @staticmethod
+    def _settle_provisional(session_id):
+        """Clear the provisional flag of a session that keeps its current content"""
+        session = storage.get_session(session_id)
+        if session and session.get("provisional"):
+            storage.save_session(session_id, {**session, "provisional": False})
+    
+    def _generate(self, topic, audience, tone, cache_key):
+        """One upstream generation, parsed (and cached if valid)
+        
+        With GROQ_CASCADE the smaller models go first and the next one is only
+        asked when the output fails validation (or the call fails).
+        """
+        similar = self._near_duplicate(topic, audience, tone)
+        if similar is not None and NEAR_DUP_MODE == "return":
+            return similar
+        messages = self._build_messages(topic, audience, tone, seed=similar)
+        models = self._cascade_models()
+        for model in models[:-1]:
+            try:
+                response = call_groq(messages, platform=self.platform, model=model)
+                content_data = self._parse_content(response, topic, audience, tone, cache_key, fallback=False)
+            except Exception as e:
+                print(f"Cascade model {model} failed: {e}")
+                content_data = None
+            if content_data:
+                return content_data
+            self._escalate(model)
         
-        messages = [
-            {"role": "system", "content": self._get_system_prompt()},
-            {"role": "user", "content": prompt}
-        ]
+        response = call_groq(messages, platform=self.platform, model=models[-1])
+        return self._parse_content(response, topic, audience, tone, cache_key)
+    
+    async def _agenerate(self, topic, audience, tone, cache_key, lane=None):
+        similar = self._near_duplicate(topic, audience, tone)
+        if similar is not None and NEAR_DUP_MODE == "return":
+            return similar
+        messages = self._build_messages(topic, audience, tone, seed=similar)
+        models = self._cascade_models()
+        for model in models[:-1]:
+            try:
+                response = await acall_groq(messages, platform=self.platform, model=model, lane=lane)
+                content_data = self._parse_content(response, topic, audience, tone, cache_key, fallback=False)
+            except Exception as e:
+                print(f"Cascade model {model} failed: {e}")
+                content_data = None
+            if content_data:
+                return content_data
+            self._escalate(model)
+        
+        response = await acall_groq(messages, platform=self.platform, model=models[-1], lane=lane)
+        return self._parse_content(response, topic, audience, tone, cache_key)
+    
+    def _near_duplicate(self, topic, audience, tone):
+        """Content of the most similar earlier generation above NEAR_DUP_THRESHOLD, or None"""
+        if NEAR_DUP_MODE == "off":
+            return None
+        match = near_duplicates.lookup(self.platform, topic, audience, tone)
+        if match is None:
+            NEAR_DUPLICATES.labels(self.platform, "miss").inc()
+            return None
+        content_data = response_cache.get(match[0])
+        NEAR_DUPLICATES.labels(self.platform, "hit" if content_data else "stale").inc()
+        return content_data
+    
+    @staticmethod
+    def _cascade_models():
+        """Models to try in order; [None] lets the router pick"""
+        return GROQ_CASCADE_MODELS if GROQ_CASCADE and GROQ_CASCADE_MODELS else [None]
+    
+    def _escalate(self, model):
+        model_router.record_escalation(model)
+        CASCADE_ESCALATIONS.labels(self.platform, model).inc()
+    
+    async def astream_content(self, topic, audience, tone, use_cache=True):
+        """Stream generation as ("item", ...) events followed by one ("done", result)
         
-        response = call_groq(messages)
+        Items are sent as soon as they are complete in the partial JSON; the
+        session is only created once the full completion has arrived.
+        """
+        cache_key = self._cache_key(topic, audience, tone)
+        content_data = response_cache.get(cache_key) if use_cache else None
+        similar = None
+        if content_data is None:
+            similar = self._near_duplicate(topic, audience, tone)
+            if similar is not None and NEAR_DUP_MODE == "return":
+                content_data = similar
+        
+        if content_data is None:
+            messages = self._build_messages(topic, audience, tone, seed=similar)
+            chunks = []
+            parser = ContentStreamParser()
+            async for delta in await acall_groq(messages, stream=True, platform=self.platform):
+                chunks.append(delta)
+                for field, index, value in parser.feed(delta):
+                    yield "item", {"field": field, "index": index, "value": value}
+            content_data = self._parse_content("".join(chunks), topic, audience, tone, cache_key)
+        else:
+            for field in CONTENT_FIELDS:
+                for index, value in enumerate(content_data.get(field, [])):
+                    yield "item", {"field": field, "index": index, "value": value}
+        
+        yield "done", self._create_session(topic, audience, tone, content_data)
+    
+    def generate_fallback(self, topic, audience, tone):
+        """Create a session from fallback content (used when the upstream call fails)"""
+        FALLBACK_CONTENT.labels(self.platform, "upstream_error").inc()
+        return self._create_session(topic, audience, tone, self._get_fallback_content(topic))
+    
+    def _cache_key(self, topic, audience, tone):
+        """Key covering the models that may answer: the cascade, or the platform's generate route"""
+        models = self._cascade_models()
+        if models == [None]:
+            models = model_router.route(self.platform, "generate")
+        return make_cache_key(self.platform, topic, audience, tone, ",".join(models), PROMPT_VERSION)
+    
+    def _build_messages(self, topic, audience, tone, seed=None):
+        """Build the generation messages for the platform"""
+        return self.spec.build_messages(topic, audience, tone, seed)
+    
+    def _parse_content(self, response, topic, audience, tone, cache_key, fallback=True):
+        """Parse the model response, caching it only if it was valid
+        
+        Invalid responses give fallback content, or None with fallback=False.
+        """
+        started = time.perf_counter()
         content_data = parse_json_response(response)
+        PARSE_LATENCY.labels("generate").observe(time.perf_counter() - started)
         
         # If parsing failed, use fallback
         if not content_data:
-            content_data = self._get_fallback_content(topic)
+            PARSE_FAILURES.labels("generate").inc()
+            if not fallback:
+                return None
+            FALLBACK_CONTENT.labels(self.platform, "parse").inc()
+            return self._get_fallback_content(topic)
         
+        response_cache.set(cache_key, content_data)
+        if response_cache.enabled:
+            near_duplicates.add(cache_key, self.platform, topic, audience, tone)
+        return content_data
+    
+    def _create_session(self, topic, audience, tone, content_data, provisional=False):
+        """Store generated content as a new session"""
         # Create session
         from datetime import datetime
         session_id = str(uuid.uuid4())
@@ -34,9 +264,10 @@ class ContentAgent:
             "content": content_data,
             "created_at": datetime.now().isoformat()
         }
+        if provisional:
+            session_data["provisional"] = True
         
         storage.save_session(session_id, session_data)
-        storage.save_conversation(session_id, [])
         
         return {
             **content_data,
@@ -45,180 +276,64 @@ class ContentAgent:
     
     def _get_fallback_content(self, topic):
         """Get fallback content if AI parsing fails"""
-        if self.platform == "linkedin":
-            return {
-                "trending_angles": [
-                    f"Professional insights about {topic}",
-                    f"Career opportunities in {topic}",
-                    f"Industry trends related to {topic}",
-                    f"Business applications of {topic}",
-                    f"Professional development through {topic}"
-                ],
-                "hashtags": ["#LinkedIn", "#Professional", "#Career", "#Industry", "#Business", f"#{topic.replace(' ', '')}"],
-                "post_blueprints": [
-                    {
-                        "hook": f"Here's what professionals need to know about {topic}...",
-                        "outline": [
-                            f"Key professional insight about {topic}",
-                            f"Industry impact and opportunities",
-                            f"Actionable advice for career growth",
-                            f"Real-world applications in business"
-                        ],
-                        "cta": "What's your experience with this? Share your thoughts in the comments."
-                    },
-                    {
-                        "hook": f"3 career lessons I learned from {topic}:",
-                        "outline": [
-                            f"Lesson 1: Strategic thinking about {topic}",
-                            f"Lesson 2: Leadership opportunities in {topic}",
-                            f"Lesson 3: Network building through {topic}",
-                            f"How to apply these in your career"
-                        ],
-                        "cta": "Which lesson resonates most with you? Let me know below."
-                    },
-                    {
-                        "hook": f"The future of {topic} in professional settings:",
-                        "outline": [
-                            f"Current state of {topic} in business",
-                            f"Emerging trends and opportunities",
-                            f"Skills professionals need to develop",
-                            f"Action steps for career preparation"
-                        ],
-                        "cta": "How are you preparing for these changes? Share your strategy."
-                    }
-                ]
-            }
+        return self.spec.render_fallback(topic)
+    
+    def chat(self, session_id, message, mode=CHAT_MODE):
+        """Chat to modify content
         
-        elif self.platform == "instagram":
-            return {
-                "trending_angles": [
-                    f"Behind the scenes of {topic}",
-                    f"Daily life with {topic}",
-                    f"Visual guide to {topic}",
-                    f"Before and after with {topic}",
-                    f"Aesthetic {topic} inspiration"
-                ],
-                "hashtags": ["#Instagram", "#Visual", "#Lifestyle", "#Aesthetic", "#Daily", f"#{topic.replace(' ', '')}", "#Inspiration"],
-                "post_blueprints": [
-                    {
-                        "hook": f"This {topic} moment caught my attention...",
-                        "outline": [
-                            f"Visual story about {topic}",
-                            f"Personal connection to {topic}",
-                            f"Lifestyle integration tips",
-                            f"Community inspiration"
-                        ],
-                        "cta": "Save this for later! What's your experience with this? ✨"
-                    },
-                    {
-                        "hook": f"Step-by-step {topic} tutorial 📖",
-                        "outline": [
-                            f"Step 1: Getting started with {topic}",
-                            f"Step 2: The key technique for {topic}",
-                            f"Step 3: Pro tips for {topic}",
-                            f"Final result and celebration"
-                        ],
-                        "cta": "Try this and tag me in your results! 🙌"
-                    },
-                    {
-                        "hook": f"Before vs After: My {topic} journey",
-                        "outline": [
-                            f"Where I started with {topic}",
-                            f"The transformation process",
-                            f"Key moments and breakthroughs",
-                            f"Current results and future goals"
-                        ],
-                        "cta": "What's your transformation story? Share below! 💫"
-                    },
-                    {
-                        "hook": f"Aesthetic {topic} inspiration for your feed ✨",
-                        "outline": [
-                            f"Color palette ideas for {topic}",
-                            f"Styling tips and arrangements",
-                            f"Photography angles and lighting",
-                            f"Creating cohesive visual story"
-                        ],
-                        "cta": "Which style speaks to you? Save for inspo! 📌"
-                    }
-                ]
-            }
+        mode="patch" asks the model for targeted edit ops on a compact view of
+        the content; mode="full" asks it to regenerate the whole content object.
+        """
+        session = storage.get_session(session_id)
+        if not session:
+            return {"error": "Session not found"}
         
-        else:  # twitter
-            return {
-                "trending_angles": [
-                    f"Hot take on {topic}",
-                    f"Thread about {topic} insights",
-                    f"Quick {topic} tips",
-                    f"Discussion starter about {topic}",
-                    f"Real-time {topic} observations"
-                ],
-                "hashtags": ["#Twitter", "#Thread", "#Discussion", f"#{topic.replace(' ', '')}", "#Insights"],
-                "post_blueprints": [
-                    {
-                        "hook": f"Unpopular opinion about {topic}... 🧵",
-                        "outline": [
-                            f"Main point about {topic}",
-                            f"Supporting evidence or example",
-                            f"Why this matters now",
-                            f"Call for community discussion"
-                        ],
-                        "cta": "What's your take? Reply with your thoughts 👇"
-                    },
-                    {
-                        "hook": f"Quick thread: 5 things about {topic} that changed my perspective",
-                        "outline": [
-                            f"Thing 1: Surprising insight about {topic}",
-                            f"Thing 2: Common misconception debunked",
-                            f"Thing 3: Practical application tip",
-                            f"Thing 4: Future implications",
-                            f"Thing 5: Key takeaway for everyone"
-                        ],
-                        "cta": "Which one surprised you most? RT if helpful! 🔄"
-                    },
-                    {
-                        "hook": f"Let's discuss: What's your experience with {topic}?",
-                        "outline": [
-                            f"My personal experience with {topic}",
-                            f"What I've learned from others",
-                            f"Common challenges people face",
-                            f"Question for the community"
-                        ],
-                        "cta": "Share your story in the replies - let's learn together! 💬"
-                    },
-                    {
-                        "hook": f"Educational thread: Everything you need to know about {topic} 📚",
-                        "outline": [
-                            f"Basic definition and importance of {topic}",
-                            f"Key concepts everyone should understand",
-                            f"Common mistakes to avoid",
-                            f"Resources for learning more",
-                            f"Action steps to get started"
-                        ],
-                        "cta": "Bookmark this thread! Share with someone who needs to see it 🔖"
-                    },
-                    {
-                        "hook": f"Real talk about {topic} - here's what nobody tells you:",
-                        "outline": [
-                            f"The reality behind {topic}",
-                            f"What the experts don't mention",
-                            f"Hidden challenges and solutions",
-                            f"Honest advice from experience"
-                        ],
-                        "cta": "Agree or disagree? Let's have an honest conversation 🗣️"
-                    }
-                ]
-            }
+        messages = self._build_chat_messages(session, message, mode)
+        response = call_groq(messages, max_tokens=self._chat_max_tokens(mode),
+                             platform=self.platform, call_type="chat")
+        return self._apply_chat_response(session_id, session, message, response, mode)
     
-    def chat(self, session_id, message):
-        """Chat to modify content"""
+    async def achat(self, session_id, message, mode=CHAT_MODE):
+        """Async version of chat"""
         session = storage.get_session(session_id)
         if not session:
             return {"error": "Session not found"}
         
-        # Get conversation history
-        conversation = storage.get_conversation(session_id)
+        messages = self._build_chat_messages(session, message, mode)
+        response = await acall_groq(messages, max_tokens=self._chat_max_tokens(mode),
+                                    platform=self.platform, call_type="chat")
+        return self._apply_chat_response(session_id, session, message, response, mode)
+    
+    async def astream_chat(self, session_id, message, mode=CHAT_MODE):
+        """Stream a chat turn as ("item", ...) events followed by one ("done", result)
+        
+        In patch mode the items are the edit ops (field "ops") as they arrive.
+        """
+        session = storage.get_session(session_id)
+        if not session:
+            yield "done", {"error": "Session not found"}
+            return
+        
+        messages = self._build_chat_messages(session, message, mode)
+        chunks = []
+        parser = ContentStreamParser(fields=("ops",) if mode == "patch" else CONTENT_FIELDS)
+        async for delta in await acall_groq(messages, max_tokens=self._chat_max_tokens(mode), stream=True,
+                                            platform=self.platform, call_type="chat"):
+            chunks.append(delta)
+            for field, index, value in parser.feed(delta):
+                yield "item", {"field": field, "index": index, "value": value}
+        
+        yield "done", self._apply_chat_response(session_id, session, message, "".join(chunks), mode)
+    
+    @staticmethod
+    def _chat_max_tokens(mode):
+        return CHAT_PATCH_MAX_TOKENS if mode == "patch" else CHAT_FULL_MAX_TOKENS
+    
+    def _build_chat_messages(self, session, message, mode=CHAT_MODE):
+        """Build chat prompt for content modification"""
+        if mode == "patch":
+            return self._build_patch_messages(session, message)
         
-        # Build chat prompt for content modification
         chat_prompt = f"""
         You are helping modify social media content for {session['platform'].upper()}.
         
@@ -243,200 +358,79 @@ class ContentAgent:
         Make sure the modifications align with the user's request while keeping the content optimized for {session['platform']}.
         """
         
-        messages = [
-            {"role": "system", "content": self._get_chat_system_prompt()},
-            {"role": "user", "content": chat_prompt}
-        ]
+        return [self.spec.chat_system_message, {"role": "user", "content": chat_prompt}]
+    
+    def _build_patch_messages(self, session, message):
+        """Compact prompt asking for edit ops instead of the whole content"""
+        chat_prompt = (
+            f"Platform: {session['platform']} | Topic: {session['topic']} | "
+            f"Audience: {session['audience']} | Tone: {session['tone']}\n"
+            f"Current content:\n{serialize_content(session['content'])}\n\n"
+            f"User request: \"{message}\""
+        )
         
-        response = call_groq(messages, max_tokens=1500)
+        # The op instructions live in the (static) system message
+        return [self.spec.patch_system_message, {"role": "user", "content": chat_prompt}]
+    
+    def _parse_chat_response(self, session, response, mode):
+        """(updated content or None, the model's reply or None) from a chat response"""
+        if mode == "patch":
+            patch = extract_json(response, required=("ops",))
+            if patch:
+                updated_data, applied = apply_patch(session["content"], patch["ops"])
+                return (updated_data if applied else None), self._reply(patch)
         
-        # Add to conversation
-        conversation.append({"role": "user", "content": message})
-        storage.save_conversation(session_id, conversation)
+        # Full mode, or the model sent complete content anyway
+        updated_data = parse_json_response(response)
+        if updated_data:
+            return updated_data, None
+        # A patch-style answer that left out "ops" is still a reply
+        return None, self._reply(extract_json(response, required=()))
+    
+    @staticmethod
+    def _reply(patch):
+        message = patch.get("message") if isinstance(patch, dict) else None
+        return message.strip() if isinstance(message, str) and message.strip() else None
+    
+    def _apply_chat_response(self, session_id, session, message, response, mode=CHAT_MODE):
+        """Store the chat turn and any updated content"""
+        user_message = {"role": "user", "content": message}
         
         # Parse updated content
-        updated_data = parse_json_response(response)
+        started = time.perf_counter()
+        updated_data, reply = self._parse_chat_response(session, response, mode)
+        PARSE_LATENCY.labels("chat").observe(time.perf_counter() - started)
         
         if updated_data:
-            # Successfully parsed updated content
+            # Successfully parsed updated content; an edited draft is no longer replaced by the late result
             session["content"] = updated_data
+            if session.get("provisional"):
+                session["provisional"] = False
             storage.save_session(session_id, session)
             
-            # Add assistant response to conversation
-            conversation.append({"role": "assistant", "content": f"✅ Updated content based on: {message}"})
-            storage.save_conversation(session_id, conversation)
+            # Append only this turn to the conversation log
+            storage.append_conversation(session_id, [
+                user_message,
+                {"role": "assistant", "content": reply or f"✅ Updated content based on: {message}"}
+            ])
             
             return {
-                "message": f"✅ I've updated your content based on: '{message}'. Check the updated content below!",
+                "message": reply or f"✅ I've updated your content based on: '{message}'. Check the updated content below!",
                 "updated_content": updated_data
             }
         else:
-            # If parsing failed, it might be a conversational response
-            conversation.append({"role": "assistant", "content": response})
-            storage.save_conversation(session_id, conversation)
+            # No edits: a conversational reply, or raw text if no JSON was found at all
+            if reply is None:
+                PARSE_FAILURES.labels("chat").inc()
+            storage.append_conversation(session_id, [
+                user_message,
+                {"role": "assistant", "content": reply or response}
+            ])
             
             return {
-                "message": response,
+                "message": reply or response,
                 "updated_content": None
             }
-    
-    def _get_system_prompt(self):
-        """Get system prompt for the platform"""
-        if self.platform == "linkedin":
-            return """You are a LinkedIn content expert. Create professional, engaging content 
-            focused on career growth, industry insights, and business value. Use 8-12 professional hashtags."""
-        
-        elif self.platform == "instagram":
-            return """You are an Instagram content expert. Create visual, engaging content 
-            focused on lifestyle, tutorials, and aesthetic appeal. Use 15-25 discovery hashtags."""
-        
-        elif self.platform == "twitter":
-            return """You are a Twitter content expert. Create concise, engaging content 
-            focused on discussions, threads, and real-time engagement. Use 5-8 strategic hashtags."""
-        
-        return "You are a social media content expert."
-    
-    def _get_chat_system_prompt(self):
-        """Get system prompt for chat/modification mode"""
-        if self.platform == "linkedin":
-            return """You are a LinkedIn content expert helping modify existing content. 
-            Focus on professional tone, career insights, and business value. 
-            Always return valid JSON with updated content when asked to modify."""
-        
-        elif self.platform == "instagram":
-            return """You are an Instagram content expert helping modify existing content. 
-            Focus on visual appeal, lifestyle content, and engagement. 
-            Always return valid JSON with updated content when asked to modify."""
-        
-        elif self.platform == "twitter":
-            return """You are a Twitter content expert helping modify existing content. 
-            Focus on concise, engaging discussions and real-time relevance. 
-            Always return valid JSON with updated content when asked to modify."""
-        
-        return "You are a social media content expert helping modify content. Always return valid JSON when asked to modify."
-    
-    def _build_prompt(self, topic, audience, tone):
-        """Build content generation prompt"""
-        if self.platform == "linkedin":
-            return f"""
-            Create LinkedIn content for "{topic}" targeting {audience} with a {tone} tone.
-            
-            Return EXACTLY this JSON structure:
-            {{
-                "trending_angles": [5-7 professional content angles],
-                "hashtags": [8-12 professional hashtags including #LinkedIn, #Professional, #CareerGrowth],
-                "post_blueprints": [
-                    {{
-                        "hook": "Professional hook line 1",
-                        "outline": ["Professional point 1", "Professional point 2", "Professional point 3"],
-                        "cta": "Professional call-to-action"
-                    }},
-                    {{
-                        "hook": "Different professional hook line 2", 
-                        "outline": ["Different point 1", "Different point 2", "Different point 3"],
-                        "cta": "Different professional CTA"
-                    }},
-                    {{
-                        "hook": "Third professional hook line 3",
-                        "outline": ["Third point 1", "Third point 2", "Third point 3"], 
-                        "cta": "Third professional CTA"
-                    }}
-                ]
-            }}
-            
-            Make all 3 blueprints different approaches to the same topic.
-            """
-        
-        elif self.platform == "instagram":
-            return f"""
-            Create Instagram content for "{topic}" targeting {audience} with a {tone} tone.
-            
-            Return EXACTLY this JSON structure:
-            {{
-                "trending_angles": [5-7 visual content angles],
-                "hashtags": [15-25 discovery hashtags including #Instagram, #Visual, #Aesthetic],
-                "post_blueprints": [
-                    {{
-                        "hook": "Visual hook for Reel/Post 1",
-                        "outline": ["Visual element 1", "Story element 1", "Engagement element 1"],
-                        "cta": "Instagram CTA 1 (save, share, tag)"
-                    }},
-                    {{
-                        "hook": "Different visual hook for Story/Carousel 2",
-                        "outline": ["Different visual 1", "Different story 1", "Different engagement 1"],
-                        "cta": "Different Instagram CTA 2"
-                    }},
-                    {{
-                        "hook": "Third visual hook for Tutorial/Behind-scenes 3",
-                        "outline": ["Tutorial step 1", "Tutorial step 2", "Tutorial step 3"],
-                        "cta": "Tutorial CTA 3"
-                    }},
-                    {{
-                        "hook": "Fourth aesthetic hook for Lifestyle content 4",
-                        "outline": ["Lifestyle element 1", "Aesthetic element 1", "Community element 1"],
-                        "cta": "Lifestyle CTA 4"
-                    }}
-                ]
-            }}
-            
-            Make all 4 blueprints different content formats (Reel, Story, Tutorial, Lifestyle).
-            """
-        
-        elif self.platform == "twitter":
-            return f"""
-            Create Twitter content for "{topic}" targeting {audience} with a {tone} tone.
-            
-            Return EXACTLY this JSON structure:
-            {{
-                "trending_angles": [5-7 Twitter content angles],
-                "hashtags": [5-8 strategic hashtags including #Twitter, #Thread],
-                "post_blueprints": [
-                    {{
-                        "hook": "Thread hook (under 280 chars) 1",
-                        "outline": ["Tweet 1 point", "Tweet 2 point", "Tweet 3 point", "Tweet 4 point"],
-                        "cta": "Thread CTA encouraging replies"
-                    }},
-                    {{
-                        "hook": "Quick take hook (under 280 chars) 2",
-                        "outline": ["Quick insight 1", "Quick insight 2", "Quick insight 3"],
-                        "cta": "Quick take CTA for retweets"
-                    }},
-                    {{
-                        "hook": "Discussion starter hook 3",
-                        "outline": ["Discussion point 1", "Discussion point 2", "Question for community"],
-                        "cta": "Discussion CTA asking for opinions"
-                    }},
-                    {{
-                        "hook": "Hot take hook 4",
-                        "outline": ["Controversial point 1", "Supporting evidence", "Why it matters"],
-                        "cta": "Hot take CTA for engagement"
-                    }},
-                    {{
-                        "hook": "Educational thread hook 5",
-                        "outline": ["Educational point 1", "Educational point 2", "Educational point 3", "Key takeaway"],
-                        "cta": "Educational CTA for sharing"
-                    }}
-                ]
-            }}
-            
-            Make all 5 blueprints different Twitter formats (Thread, Quick take, Discussion, Hot take, Educational).
-            """
-        
-        return f"""
-        Create social media content for {self.platform.upper()} about "{topic}" 
-        for {audience} with a {tone} tone.
-        
-        Return JSON with:
-        - trending_angles: 5-7 content angles
-        - hashtags: platform-appropriate hashtags
-        - post_blueprints: 3-5 different post structures with hook, outline, and cta
-        
-        Make each blueprint a different approach to the same topic.
-        """
 
 # Agent instances
-agents = {
-    "linkedin": ContentAgent("linkedin"),
-    "instagram": ContentAgent("instagram"), 
-    "twitter": ContentAgent("twitter")
-}
\ No newline at end of file
+agents = {platform: ContentAgent(platform) for platform in platforms}
@@ -1,10 +1,25 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hashlib
+import json
+import math
+import time
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from agents import agents
-from config import PLATFORMS
+from config import CHAT_MODE, GENERATE_DEADLINE, GZIP_MIN_SIZE
+from platform_registry import platforms
+from groq_service import client_stats, rate_limiter, model_router, close_client, close_async_client
+from cache import response_cache, generate_flights
+from near_duplicates import near_duplicates
+from metrics import REQUEST_LATENCY, render as render_metrics
+from rate_limiter import RateLimitError
+from jobs import job_manager, parse_rows
+from search_index import IndexWarmingError
 
 app = FastAPI(title="AntiSocial API")
 
@@ -16,15 +31,111 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class CompressionMiddleware:
+    """GZip responses above GZIP_MIN_SIZE, except streams (gzip would hold back their events)"""
+    def __init__(self, app, minimum_size):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "") if scope["type"] == "http" else ""
+        if not path or path.endswith("/stream") or path.endswith("/results"):
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
+
+if GZIP_MIN_SIZE > 0:
+    app.add_middleware(CompressionMiddleware, minimum_size=GZIP_MIN_SIZE)
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    """Per-endpoint latency histogram (route template, so ids don't explode labels)"""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        endpoint = route.path if route else "unmatched"
+        REQUEST_LATENCY.labels(request.method, endpoint, str(status)).observe(time.perf_counter() - started)
+
+@app.on_event("startup")
+async def startup():
+    # Resumes jobs left unfinished by the previous run
+    await job_manager.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    from storage import storage
+    await job_manager.stop()
+    close_client()
+    await close_async_client()
+    storage.close()
+
 class ContentRequest(BaseModel):
     platform: str
     topic: str
     audience: str
     tone: str
+    bypass_cache: bool = False
+    # Seconds before provisional content is returned (default GENERATE_DEADLINE, 0 waits)
+    deadline: Optional[float] = None
+
+class MultiContentRequest(BaseModel):
+    topic: str
+    audience: str
+    tone: str
+    platforms: Optional[List[str]] = None
+    bypass_cache: bool = False
 
 class ChatRequest(BaseModel):
     session_id: str
     message: str
+    mode: Literal["patch", "full"] = CHAT_MODE
+
+def _rate_limited(error):
+    """429 with Retry-After instead of a generic 500"""
+    retry_after = max(1, math.ceil(error.retry_after or 1))
+    return HTTPException(429, str(error), headers={"Retry-After": str(retry_after)})
+
+def _etag(*parts):
+    """Weak ETag from the values that identify a representation (gzip and identity bodies share it)"""
+    return 'W/"' + hashlib.blake2b(json.dumps(parts).encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+def _not_modified(request, etag):
+    """If-None-Match matches etag (weak comparison, as RFC 9110 specifies for it)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag.removeprefix("W/") in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+def _cached_json(data, etag):
+    # no-cache: clients keep the body but revalidate with If-None-Match every time
+    return JSONResponse(data, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _sse_stream(events):
+    """Format agent stream events as Server-Sent Events"""
+    try:
+        async for event, data in events:
+            yield _sse_event(event, data)
+    except RateLimitError as e:
+        yield _sse_event("error", {"detail": str(e), "status": 429, "retry_after": e.retry_after})
+    except Exception as e:
+        yield _sse_event("error", {"detail": str(e)})
+
+def _sse_response(events):
+    return StreamingResponse(
+        _sse_stream(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/")
 def root():
@@ -32,24 +143,118 @@ def root():
 
 @app.get("/platforms")
 def get_platforms():
-    return {"platforms": list(PLATFORMS.values())}
+    return {"platforms": [spec.info for spec in platforms.values()]}
+
+@app.get("/debug/http")
+def get_http_stats():
+    return client_stats.snapshot()
+
+@app.get("/debug/cache")
+def get_cache_stats():
+    return {
+        **response_cache.stats(),
+        "single_flight": generate_flights.stats(),
+        "near_duplicates": near_duplicates.stats()
+    }
+
+@app.get("/debug/storage")
+def get_storage_stats():
+    from storage import storage
+    return storage.stats()
+
+@app.get("/debug/ratelimit")
+def get_rate_limit_stats():
+    return rate_limiter.snapshot()
+
+@app.get("/debug/models")
+def get_model_stats():
+    return model_router.snapshot()
+
+@app.get("/debug/jobs")
+def get_job_stats():
+    return job_manager.stats()
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics"""
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
 
 @app.post("/generate")
-def generate_content(request: ContentRequest):
+async def generate_content(request: ContentRequest):
     try:
         if request.platform not in agents:
             raise HTTPException(400, "Invalid platform")
         
         agent = agents[request.platform]
-        result = agent.generate_content(request.topic, request.audience, request.tone)
+        deadline = GENERATE_DEADLINE if request.deadline is None else request.deadline
+        if deadline > 0:
+            result = await agent.agenerate_within(
+                request.topic, request.audience, request.tone, deadline,
+                use_cache=not request.bypass_cache
+            )
+        else:
+            result = await agent.agenerate_content(
+                request.topic, request.audience, request.tone,
+                use_cache=not request.bypass_cache
+            )
         
         return result
         
+    except HTTPException:
+        raise
+    except RateLimitError as e:
+        raise _rate_limited(e)
+    except Exception as e:
+        raise HTTPException(500, str(e))
+
+@app.post("/generate/stream")
+async def generate_content_stream(request: ContentRequest):
+    if request.platform not in agents:
+        raise HTTPException(400, "Invalid platform")
+    
+    agent = agents[request.platform]
+    return _sse_response(agent.astream_content(
+        request.topic, request.audience, request.tone,
+        use_cache=not request.bypass_cache
+    ))
+
+@app.post("/generate/multi")
+async def generate_multi(request: MultiContentRequest):
+    try:
+        # Default to every platform, drop duplicates but keep the order
+        platforms = list(dict.fromkeys(request.platforms or agents.keys()))
+        invalid = [p for p in platforms if p not in agents]
+        if invalid:
+            raise HTTPException(400, f"Invalid platform: {', '.join(invalid)}")
+        
+        # Run all platforms at once so the total time is the slowest single call
+        outcomes = await asyncio.gather(*[
+            agents[platform].agenerate_content(
+                request.topic, request.audience, request.tone,
+                use_cache=not request.bypass_cache
+            )
+            for platform in platforms
+        ], return_exceptions=True)
+        
+        results = []
+        for platform, outcome in zip(platforms, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"Generation failed for {platform}: {outcome}")
+                result = agents[platform].generate_fallback(request.topic, request.audience, request.tone)
+                results.append({"platform": platform, "fallback": True, "error": str(outcome), **result})
+            else:
+                results.append({"platform": platform, "fallback": False, **outcome})
+        
+        return {"results": results}
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(500, str(e))
 
 @app.post("/chat")
-def chat_with_agent(request: ChatRequest):
+async def chat_with_agent(request: ChatRequest):
     try:
         # Find which agent to use based on session
         from storage import storage
@@ -59,47 +264,130 @@ def chat_with_agent(request: ChatRequest):
             raise HTTPException(404, "Session not found")
         
         agent = agents[session["platform"]]
-        result = agent.chat(request.session_id, request.message)
+        result = await agent.achat(request.session_id, request.message, request.mode)
         
         return result
         
+    except HTTPException:
+        raise
+    except RateLimitError as e:
+        raise _rate_limited(e)
     except Exception as e:
         raise HTTPException(500, str(e))
 
+@app.post("/chat/stream")
+async def chat_with_agent_stream(request: ChatRequest):
+    from storage import storage
+    session = storage.get_session(request.session_id)
+    
+    if not session:
+        raise HTTPException(404, "Session not found")
+    
+    agent = agents[session["platform"]]
+    return _sse_response(agent.astream_chat(request.session_id, request.message, request.mode))
+
 @app.get("/sessions")
-def get_sessions():
+def get_sessions(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    platform: Optional[str] = None,
+    topic_prefix: Optional[str] = None
+):
+    from storage import storage
+    # Any save changes the list version, so an unchanged ETag means an unchanged page
+    etag = _etag(storage.list_version(), limit, cursor, platform, topic_prefix)
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
     try:
-        from storage import storage
-        sessions = storage.get_all_sessions()
-        
-        # Format sessions for UI display
-        session_list = []
-        for session_id, session_data in sessions.items():
-            session_list.append({
-                "session_id": session_id,
-                "platform": session_data.get("platform", "unknown"),
-                "topic": session_data.get("topic", "Untitled"),
-                "audience": session_data.get("audience", ""),
-                "tone": session_data.get("tone", ""),
-                "created_at": session_data.get("created_at", "")
-            })
-        
-        # Sort by most recent first (if we had timestamps)
-        return {"sessions": session_list}
+        # Newest first, served from the summary index (no session bodies are read)
+        return _cached_json(storage.list_sessions(limit, cursor, platform, topic_prefix), etag)
         
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        raise HTTPException(500, str(e))
+
+@app.get("/search")
+def search_sessions(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    platform: Optional[str] = None
+):
+    """Sessions matching every word of q (prefix*, #hashtag), best first"""
+    from storage import storage
+    etag = _etag(storage.list_version(), q, limit, offset, platform)
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    try:
+        return _cached_json(storage.search_sessions(q, limit, offset, platform), etag)
+    except IndexWarmingError as e:
+        raise HTTPException(503, str(e), headers={"Retry-After": "5"})
     except Exception as e:
         raise HTTPException(500, str(e))
 
 @app.get("/sessions/{session_id}")
-def get_session(session_id: str):
+def get_session(session_id: str, request: Request):
+    from storage import storage
+    # updated_at comes from the cache or the index: the session itself is only read on a miss
+    version = storage.session_version(session_id)
+    if version is None:
+        raise HTTPException(404, "Session not found")
+    etag = _etag(session_id, version)
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    
     try:
-        from storage import storage
         session = storage.get_session(session_id)
         
         if not session:
             raise HTTPException(404, "Session not found")
         
-        return session
+        return _cached_json(session, _etag(session_id, session.get("updated_at") or ""))
         
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(500, str(e))
\ No newline at end of file
+        raise HTTPException(500, str(e))
+
+@app.get("/sessions/{session_id}/conversation")
+def get_conversation(session_id: str, last_n: Optional[int] = Query(None, ge=1)):
+    from storage import storage
+    if not storage.get_session(session_id):
+        raise HTTPException(404, "Session not found")
+    
+    try:
+        return {"messages": storage.get_conversation(session_id, last_n)}
+        
+    except Exception as e:
+        raise HTTPException(500, str(e))
+
+@app.post("/jobs")
+async def create_job(request: Request, bypass_cache: bool = False):
+    """Submit campaign rows as CSV (Content-Type: text/csv) or a JSON list"""
+    try:
+        rows = parse_rows(await request.body(), request.headers.get("content-type"))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    
+    job_id = job_manager.submit(rows, bypass_cache)
+    return job_manager.store.status(job_id)
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    status = job_manager.store.status(job_id)
+    if not status:
+        raise HTTPException(404, "Job not found")
+    return status
+
+@app.get("/jobs/{job_id}/results")
+def get_job_results(job_id: str, after: int = Query(0, ge=0), follow: bool = True):
+    """Finished rows as NDJSON in completion order; follow keeps streaming until the job is done"""
+    if not job_manager.store.status(job_id):
+        raise HTTPException(404, "Job not found")
+    return StreamingResponse(
+        job_manager.stream_results(job_id, after, follow),
+        media_type="application/x-ndjson"
+    )
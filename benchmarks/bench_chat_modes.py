@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Compare "full" and "patch" chat modes on recorded transcripts.
+
+For each transcript in benchmarks/chat_transcripts.json this builds the
+prompt of both modes, estimates prompt and completion tokens from the
+recorded completions, and checks that applying the patch gives the same
+content as the full regeneration. With --live it also sends both prompts
+to Groq and measures latency (needs GROQ_API_KEY).
+
+    python benchmarks/bench_chat_modes.py [--json] [--live]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from agents import agents  # noqa: E402
+from groq_service import call_groq  # noqa: E402
+
+def estimate_tokens(text):
+    """~4 characters per token, close enough to compare two prompts"""
+    return max(1, len(text) // 4)
+
+def prompt_tokens(messages):
+    return sum(estimate_tokens(message["content"]) for message in messages)
+
+def run_mode(agent, session, transcript, mode, live):
+    messages = agent._build_chat_messages(session, transcript["message"], mode)
+    response = transcript[f"{mode}_response"]
+    row = {
+        "prompt_tokens": prompt_tokens(messages),
+        "completion_tokens": estimate_tokens(response),
+        "max_tokens": agent._chat_max_tokens(mode)
+    }
+    row["total_tokens"] = row["prompt_tokens"] + row["completion_tokens"]
+    if live:
+        started = time.perf_counter()
+        response = call_groq(messages, max_tokens=row["max_tokens"])
+        row["latency_ms"] = (time.perf_counter() - started) * 1000
+        row["live_completion_tokens"] = estimate_tokens(response)
+    row["content"] = agent._parse_chat_response(session, transcript[f"{mode}_response"], mode)[0]
+    return row
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transcripts", default=str(Path(__file__).with_name("chat_transcripts.json")))
+    parser.add_argument("--live", action="store_true", help="also call Groq and time both modes")
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    transcripts = json.loads(Path(args.transcripts).read_text())
+    rows = []
+    for transcript in transcripts:
+        agent = agents[transcript["platform"]]
+        session = {key: transcript[key] for key in ("platform", "topic", "audience", "tone", "content")}
+        full = run_mode(agent, session, transcript, "full", args.live)
+        patch = run_mode(agent, session, transcript, "patch", args.live)
+        same = full.pop("content") == patch.pop("content")
+        rows.append({"message": transcript["message"], "full": full, "patch": patch, "same_result": same})
+
+    def mean(mode, key):
+        values = [row[mode][key] for row in rows if key in row[mode]]
+        return sum(values) / len(values) if values else None
+
+    summary = {"transcripts": len(rows), "same_result": sum(row["same_result"] for row in rows)}
+    for key in ("prompt_tokens", "completion_tokens", "total_tokens", "latency_ms"):
+        full_mean, patch_mean = mean("full", key), mean("patch", key)
+        if full_mean is None:
+            continue
+        summary[key] = {
+            "full": full_mean,
+            "patch": patch_mean,
+            "reduction": 1 - patch_mean / full_mean
+        }
+
+    if args.json:
+        print(json.dumps({"summary": summary, "transcripts": rows}, indent=2))
+        return
+
+    for row in rows:
+        print(f"{row['message'][:50]:50} prompt {row['full']['prompt_tokens']:5} -> {row['patch']['prompt_tokens']:5}"
+              f"  completion {row['full']['completion_tokens']:5} -> {row['patch']['completion_tokens']:5}"
+              f"  same result: {row['same_result']}")
+    print()
+    for key in ("prompt_tokens", "completion_tokens", "total_tokens", "latency_ms"):
+        if key in summary:
+            values = summary[key]
+            print(f"mean {key}: full {values['full']:.1f}, patch {values['patch']:.1f} "
+                  f"({values['reduction']:.0%} less)")
+    print(f"patch result matches full regeneration: {summary['same_result']}/{summary['transcripts']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Near-duplicate index: load time, lookup latency and hit rate at scale.
+
+Writes --size synthetic entries (Zipf-distributed topic words, so common
+words like "ai" have long postings lists), loads them into a
+NearDuplicateIndex and times lookups for near variants of stored topics
+(a word added or dropped) and for unrelated topics.
+
+    python benchmarks/bench_near_duplicates.py [--size 1000000] [--lookups 5000]
+                                               [--threshold 0.7] [--postings 128] [--json]
+"""
+import argparse
+import itertools
+import json
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from near_duplicates import NearDuplicateIndex  # noqa: E402
+
+PLATFORMS = ("linkedin", "instagram", "twitter")
+TONES = ("professional", "casual", "funny", "educational")
+VOCABULARY = [f"w{i}" for i in range(20000)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+AUDIENCES = [f"{a} {b}" for a in ("college", "senior", "junior", "remote", "startup")
+             for b in ("students", "developers", "founders", "designers", "marketers")]
+
+def random_topic(rng):
+    return " ".join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=rng.randint(2, 5)))
+
+def variant(rng, topic):
+    """The topic with one word added or dropped"""
+    words = topic.split()
+    if len(words) > 2 and rng.random() < 0.5:
+        words.pop(rng.randrange(len(words)))
+    else:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(VOCABULARY))
+    return " ".join(words)
+
+def percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+def time_lookups(index, queries):
+    latencies = []
+    hits = 0
+    for platform, topic, audience, tone in queries:
+        started = time.perf_counter()
+        match = index.lookup(platform, topic, audience, tone)
+        latencies.append((time.perf_counter() - started) * 1e6)
+        hits += match is not None
+    latencies.sort()
+    return {
+        "hit_rate": hits / len(queries),
+        "p50_us": percentile(latencies, 50),
+        "p99_us": percentile(latencies, 99),
+        "max_us": latencies[-1]
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1000000)
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--postings", type=int, default=128, help="entries kept per topic word")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "near_duplicates.jsonl"
+        probe = NearDuplicateIndex(path, enabled=False)
+        stored = []
+        with open(path, "w") as f:
+            for i in range(args.size):
+                row = (rng.choice(PLATFORMS), random_topic(rng), rng.choice(AUDIENCES), rng.choice(TONES))
+                f.write(json.dumps([f"key{i}", row[0], row[3], row[1], row[2], probe.version]) + "\n")
+                # Reservoir sample: queries target entries of every age
+                if len(stored) < args.lookups:
+                    stored.append(row)
+                elif rng.random() < args.lookups / (i + 1):
+                    stored[rng.randrange(args.lookups)] = row
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        index = NearDuplicateIndex(path, threshold=args.threshold, postings=args.postings)
+        load_seconds = time.perf_counter() - started
+        rss_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+
+    near = [(platform, variant(rng, topic), audience, tone) for platform, topic, audience, tone in stored]
+    unrelated = [(rng.choice(PLATFORMS), random_topic(rng), rng.choice(AUDIENCES), rng.choice(TONES))
+                 for _ in range(args.lookups)]
+    report = {
+        "size": args.size,
+        "threshold": args.threshold,
+        "postings": args.postings,
+        "load_seconds": load_seconds,
+        "index_rss_mb": rss_mb,
+        "near_variants": time_lookups(index, near),
+        "unrelated": time_lookups(index, unrelated)
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.size} entries loaded in {load_seconds:.1f}s (+{rss_mb:.0f} MB RSS)")
+    for name in ("near_variants", "unrelated"):
+        row = report[name]
+        print(f"{name:14} hit rate {row['hit_rate']:6.1%}  p50 {row['p50_us']:7.1f} us  "
+              f"p99 {row['p99_us']:7.1f} us  max {row['max_us']:7.1f} us")
+
+if __name__ == "__main__":
+    main()
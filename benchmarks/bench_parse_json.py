@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Compare the original parse_json_response with json_parser.extract_json.
+
+Runs both over benchmarks/parse_corpus.json (model responses with the
+defects we see in practice) and prints success counts and time per call.
+
+    python benchmarks/bench_parse_json.py [--repeat 2000] [--json]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from json_parser import extract_json  # noqa: E402
+
+def legacy_parse_json_response(content):
+    """parse_json_response as it was before extract_json"""
+    try:
+        start = content.find('{')
+        end = content.rfind('}') + 1
+
+        if start != -1 and end > start:
+            parsed = json.loads(content[start:end])
+            if ("trending_angles" in parsed and
+                "hashtags" in parsed and
+                "post_blueprints" in parsed):
+                return parsed
+    except Exception:
+        pass
+    return None
+
+def time_per_call(func, text, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(text)
+    return (time.perf_counter() - started) / repeat * 1e6
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=str(Path(__file__).with_name("parse_corpus.json")))
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    cases = json.loads(Path(args.corpus).read_text())
+    rows = []
+    for case in cases:
+        text = case["response"]
+        rows.append({
+            "name": case["name"],
+            "legacy_ok": legacy_parse_json_response(text) is not None,
+            "new_ok": extract_json(text) is not None,
+            "legacy_us": time_per_call(legacy_parse_json_response, text, args.repeat),
+            "new_us": time_per_call(extract_json, text, args.repeat)
+        })
+
+    summary = {
+        "cases": len(rows),
+        "legacy_parsed": sum(r["legacy_ok"] for r in rows),
+        "new_parsed": sum(r["new_ok"] for r in rows),
+        "legacy_mean_us": sum(r["legacy_us"] for r in rows) / len(rows),
+        "new_mean_us": sum(r["new_us"] for r in rows) / len(rows)
+    }
+
+    if args.json:
+        print(json.dumps({"summary": summary, "cases": rows}, indent=2))
+        return
+
+    print(f"{'case':32} {'legacy':>8} {'new':>8} {'legacy us':>10} {'new us':>10}")
+    for r in rows:
+        print(f"{r['name']:32} {str(r['legacy_ok']):>8} {str(r['new_ok']):>8} "
+              f"{r['legacy_us']:10.1f} {r['new_us']:10.1f}")
+    print(f"\nparsed: legacy {summary['legacy_parsed']}/{summary['cases']}, "
+          f"new {summary['new_parsed']}/{summary['cases']}")
+    print(f"mean time per call: legacy {summary['legacy_mean_us']:.1f} us, "
+          f"new {summary['new_mean_us']:.1f} us")
+
+if __name__ == "__main__":
+    main()
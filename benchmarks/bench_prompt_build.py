@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Prompt construction cost per request: if/elif f-strings vs. the platform registry.
+
+Builds the generation messages for every platform with the original
+ContentAgent code (copied below as LegacyAgent) and with platform_registry's precompiled
+templates, and reports time per request, prompt size and how many leading
+bytes two requests with different topics share (the part upstream prompt
+caching can reuse).
+
+    python benchmarks/bench_prompt_build.py [--repeat 20000] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from platform_registry import platforms  # noqa: E402
+
+class LegacyAgent:
+    """ContentAgent's prompt construction before the platform registry"""
+    def __init__(self, platform):
+        self.platform = platform
+
+    def _build_messages(self, topic, audience, tone):
+        """Build the generation messages for the platform"""
+        prompt = self._build_prompt(topic, audience, tone)
+        
+        return [
+            {"role": "system", "content": self._get_system_prompt()},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _get_system_prompt(self):
+        """Get system prompt for the platform"""
+        if self.platform == "linkedin":
+            return """You are a LinkedIn content expert. Create professional, engaging content 
+            focused on career growth, industry insights, and business value. Use 8-12 professional hashtags."""
+        
+        elif self.platform == "instagram":
+            return """You are an Instagram content expert. Create visual, engaging content 
+            focused on lifestyle, tutorials, and aesthetic appeal. Use 15-25 discovery hashtags."""
+        
+        elif self.platform == "twitter":
+            return """You are a Twitter content expert. Create concise, engaging content 
+            focused on discussions, threads, and real-time engagement. Use 5-8 strategic hashtags."""
+        
+        return "You are a social media content expert."
+    
+    def _build_prompt(self, topic, audience, tone):
+        """Build content generation prompt"""
+        if self.platform == "linkedin":
+            return f"""
+            Create LinkedIn content for "{topic}" targeting {audience} with a {tone} tone.
+            
+            Return EXACTLY this JSON structure:
+            {{
+                "trending_angles": [5-7 professional content angles],
+                "hashtags": [8-12 professional hashtags including #LinkedIn, #Professional, #CareerGrowth],
+                "post_blueprints": [
+                    {{
+                        "hook": "Professional hook line 1",
+                        "outline": ["Professional point 1", "Professional point 2", "Professional point 3"],
+                        "cta": "Professional call-to-action"
+                    }},
+                    {{
+                        "hook": "Different professional hook line 2", 
+                        "outline": ["Different point 1", "Different point 2", "Different point 3"],
+                        "cta": "Different professional CTA"
+                    }},
+                    {{
+                        "hook": "Third professional hook line 3",
+                        "outline": ["Third point 1", "Third point 2", "Third point 3"], 
+                        "cta": "Third professional CTA"
+                    }}
+                ]
+            }}
+            
+            Make all 3 blueprints different approaches to the same topic.
+            """
+        
+        elif self.platform == "instagram":
+            return f"""
+            Create Instagram content for "{topic}" targeting {audience} with a {tone} tone.
+            
+            Return EXACTLY this JSON structure:
+            {{
+                "trending_angles": [5-7 visual content angles],
+                "hashtags": [15-25 discovery hashtags including #Instagram, #Visual, #Aesthetic],
+                "post_blueprints": [
+                    {{
+                        "hook": "Visual hook for Reel/Post 1",
+                        "outline": ["Visual element 1", "Story element 1", "Engagement element 1"],
+                        "cta": "Instagram CTA 1 (save, share, tag)"
+                    }},
+                    {{
+                        "hook": "Different visual hook for Story/Carousel 2",
+                        "outline": ["Different visual 1", "Different story 1", "Different engagement 1"],
+                        "cta": "Different Instagram CTA 2"
+                    }},
+                    {{
+                        "hook": "Third visual hook for Tutorial/Behind-scenes 3",
+                        "outline": ["Tutorial step 1", "Tutorial step 2", "Tutorial step 3"],
+                        "cta": "Tutorial CTA 3"
+                    }},
+                    {{
+                        "hook": "Fourth aesthetic hook for Lifestyle content 4",
+                        "outline": ["Lifestyle element 1", "Aesthetic element 1", "Community element 1"],
+                        "cta": "Lifestyle CTA 4"
+                    }}
+                ]
+            }}
+            
+            Make all 4 blueprints different content formats (Reel, Story, Tutorial, Lifestyle).
+            """
+        
+        elif self.platform == "twitter":
+            return f"""
+            Create Twitter content for "{topic}" targeting {audience} with a {tone} tone.
+            
+            Return EXACTLY this JSON structure:
+            {{
+                "trending_angles": [5-7 Twitter content angles],
+                "hashtags": [5-8 strategic hashtags including #Twitter, #Thread],
+                "post_blueprints": [
+                    {{
+                        "hook": "Thread hook (under 280 chars) 1",
+                        "outline": ["Tweet 1 point", "Tweet 2 point", "Tweet 3 point", "Tweet 4 point"],
+                        "cta": "Thread CTA encouraging replies"
+                    }},
+                    {{
+                        "hook": "Quick take hook (under 280 chars) 2",
+                        "outline": ["Quick insight 1", "Quick insight 2", "Quick insight 3"],
+                        "cta": "Quick take CTA for retweets"
+                    }},
+                    {{
+                        "hook": "Discussion starter hook 3",
+                        "outline": ["Discussion point 1", "Discussion point 2", "Question for community"],
+                        "cta": "Discussion CTA asking for opinions"
+                    }},
+                    {{
+                        "hook": "Hot take hook 4",
+                        "outline": ["Controversial point 1", "Supporting evidence", "Why it matters"],
+                        "cta": "Hot take CTA for engagement"
+                    }},
+                    {{
+                        "hook": "Educational thread hook 5",
+                        "outline": ["Educational point 1", "Educational point 2", "Educational point 3", "Key takeaway"],
+                        "cta": "Educational CTA for sharing"
+                    }}
+                ]
+            }}
+            
+            Make all 5 blueprints different Twitter formats (Thread, Quick take, Discussion, Hot take, Educational).
+            """
+        
+        return f"""
+        Create social media content for {self.platform.upper()} about "{topic}" 
+        for {audience} with a {tone} tone.
+        
+        Return JSON with:
+        - trending_angles: 5-7 content angles
+        - hashtags: platform-appropriate hashtags
+        - post_blueprints: 3-5 different post structures with hook, outline, and cta
+        
+        Make each blueprint a different approach to the same topic.
+        """
+
+def legacy_build_messages(platform, topic, audience, tone):
+    return LEGACY_AGENTS[platform]._build_messages(topic, audience, tone)
+
+LEGACY_AGENTS = {platform: LegacyAgent(platform) for platform in platforms}
+
+def registry_build_messages(platform, topic, audience, tone):
+    return platforms[platform].build_messages(topic, audience, tone)
+
+def time_per_call(func, platform, repeat):
+    started = time.perf_counter()
+    for i in range(repeat):
+        func(platform, f"topic {i}", "developers", "casual")
+    return (time.perf_counter() - started) / repeat * 1e6
+
+def prompt_text(messages):
+    return "".join(message["content"] for message in messages)
+
+def shared_prefix(func, platform):
+    """Leading characters two requests with different inputs have in common"""
+    first = prompt_text(func(platform, "remote work", "managers", "professional"))
+    second = prompt_text(func(platform, "AI tools", "students", "casual"))
+    return len(os.path.commonprefix([first, second]))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20000)
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    rows = []
+    for platform in platforms:
+        legacy = legacy_build_messages(platform, "remote work", "managers", "professional")
+        new = registry_build_messages(platform, "remote work", "managers", "professional")
+        rows.append({
+            "platform": platform,
+            "legacy_us": time_per_call(legacy_build_messages, platform, args.repeat),
+            "new_us": time_per_call(registry_build_messages, platform, args.repeat),
+            "legacy_chars": len(prompt_text(legacy)),
+            "new_chars": len(prompt_text(new)),
+            "legacy_shared_prefix": shared_prefix(legacy_build_messages, platform),
+            "new_shared_prefix": shared_prefix(registry_build_messages, platform)
+        })
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'platform':10} {'legacy us':>10} {'new us':>8} {'legacy chars':>13} {'new chars':>10} "
+          f"{'legacy prefix':>14} {'new prefix':>11}")
+    for row in rows:
+        print(f"{row['platform']:10} {row['legacy_us']:10.2f} {row['new_us']:8.2f} {row['legacy_chars']:13} "
+              f"{row['new_chars']:10} {row['legacy_shared_prefix']:14} {row['new_shared_prefix']:11}")
+    legacy_total = sum(row["legacy_us"] for row in rows)
+    new_total = sum(row["new_us"] for row in rows)
+    print(f"\nper request: {legacy_total / len(rows):.2f} us -> {new_total / len(rows):.2f} us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Session search: index build/load time, memory and query latency at scale.
+
+Indexes --size synthetic sessions (Zipf-distributed words, so common words
+match a large share of sessions) through SearchIndex.add, as save_session
+does, reloads the index from the snapshot written on close, then times
+word, two-word, prefix and hashtag queries. For comparison it times the
+old approach (parse every session's JSON and scan it) on --scan-size
+sessions and scales it up.
+
+    python benchmarks/bench_search.py [--size 300000] [--queries 200] [--json]
+"""
+import argparse
+import itertools
+import json
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from search_index import SearchIndex  # noqa: E402
+
+PLATFORMS = ("linkedin", "instagram", "twitter")
+VOCABULARY = [f"w{i}" for i in range(50000)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+HASHTAGS = [f"#tag{i}" for i in range(5000)]
+
+def words(rng, k):
+    return " ".join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=k))
+
+def make_session(rng, i):
+    return {
+        "platform": rng.choice(PLATFORMS),
+        "topic": words(rng, rng.randint(2, 5)),
+        "audience": "developers",
+        "tone": "casual",
+        "created_at": f"2026-01-01T00:00:{i:09d}",
+        "content": {
+            "trending_angles": [words(rng, 6) for _ in range(6)],
+            "hashtags": rng.sample(HASHTAGS, 6),
+            "post_blueprints": [
+                {"hook": words(rng, 8), "outline": [words(rng, 5) for _ in range(3)], "cta": words(rng, 4)}
+                for _ in range(5)
+            ]
+        }
+    }
+
+def percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+def time_queries(index, queries):
+    latencies = []
+    totals = 0
+    for query in queries:
+        started = time.perf_counter()
+        totals += index.search(query)["total"]
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        "avg_matches": totals / len(queries),
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1]
+    }
+
+def scan(texts, word):
+    """The old approach: parse every session, then look for the word in it"""
+    matches = 0
+    for text in texts:
+        data = json.loads(text)
+        content = data["content"]
+        fields = [data["topic"], *content["trending_angles"], *content["hashtags"],
+                  *(blueprint["hook"] for blueprint in content["post_blueprints"])]
+        matches += any(word in field.lower().split() for field in fields)
+    return matches
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=300000)
+    parser.add_argument("--queries", type=int, default=200, help="queries per kind")
+    parser.add_argument("--scan-size", type=int, default=20000, help="sessions scanned for the baseline")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "search_index.jsonl"
+        index = SearchIndex(path)
+        index.load(list)
+        scan_texts = []
+        add_seconds = 0
+        add_max = 0
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        for i in range(args.size):
+            session = make_session(rng, i)
+            started = time.perf_counter()
+            index.add(f"session{i}", session)
+            elapsed = time.perf_counter() - started
+            add_seconds += elapsed
+            add_max = max(add_max, elapsed)
+            if i < args.scan_size:
+                scan_texts.append(json.dumps(session, indent=2))
+        rss_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+        # As on shutdown: fold the journal into the snapshot
+        index.close()
+        file_mb = index.snapshot_path.stat().st_size / 1024 / 1024
+        del index
+
+        started = time.perf_counter()
+        index = SearchIndex(path)
+        index.load(list)
+        load_seconds = time.perf_counter() - started
+
+        def common():
+            return VOCABULARY[rng.randrange(20, 200)]
+
+        def rare():
+            return VOCABULARY[rng.randrange(1000, len(VOCABULARY))]
+
+        # Words ranked 20-200 are in 4-33% of sessions (the top 20 are stopword-frequent)
+        kinds = {
+            "common_word": [common() for _ in range(args.queries)],
+            "rare_word": [rare() for _ in range(args.queries)],
+            "two_words": [f"{common()} {rare()}" for _ in range(args.queries)],
+            "common_pair": [f"{common()} {common()}" for _ in range(args.queries)],
+            "prefix": [f"w{rng.randrange(20, 100)}*" for _ in range(args.queries)],
+            "hashtag": [rng.choice(HASHTAGS) for _ in range(args.queries)]
+        }
+        report = {
+            "size": args.size,
+            "add_us_per_session": add_seconds / args.size * 1e6,
+            "add_max_ms": add_max * 1000,
+            "snapshot_mb": file_mb,
+            "load_seconds": load_seconds,
+            "index_rss_mb": rss_mb,
+            "index": index.stats(),
+            "queries": {kind: time_queries(index, queries) for kind, queries in kinds.items()}
+        }
+
+    scan_words = [common() for _ in range(5)]
+    started = time.perf_counter()
+    for word in scan_words:
+        scan(scan_texts, word)
+    scan_ms = (time.perf_counter() - started) / len(scan_words) * 1000
+    report["scan_baseline_ms"] = scan_ms * args.size / len(scan_texts)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.size} sessions indexed at {report['add_us_per_session']:.0f} us each "
+          f"(slowest {report['add_max_ms']:.1f} ms, {file_mb:.0f} MB snapshot), reloaded in {load_seconds:.1f}s (+{rss_mb:.0f} MB RSS)")
+    for kind, row in report["queries"].items():
+        print(f"{kind:12} {row['avg_matches']:9.0f} matches  p50 {row['p50_ms']:7.2f} ms  "
+              f"p99 {row['p99_ms']:7.2f} ms  max {row['max_ms']:7.2f} ms")
+    print(f"parse-and-scan baseline: {report['scan_baseline_ms']:.0f} ms per query "
+          f"(measured on {len(scan_texts)} sessions, scaled to {args.size})")
+
+if __name__ == "__main__":
+    main()
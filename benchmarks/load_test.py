@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""Load test the API against the mock Groq server.
+
+Starts benchmarks/mock_groq.py and the API (uvicorn, pointed at the mock
+through GROQ_BASE_URL), seeds a session store of each requested size,
+then drives /generate, /chat, /sessions and /sessions/{id} at each
+concurrency level and prints p50/p95/p99 latency and throughput as JSON.
+Seeded stores are kept in --workdir and reused by later runs.
+
+    python benchmarks/load_test.py [--sizes 10,1000,100000,1000000]
+                                   [--concurrency 1,8,32] [--requests 200]
+                                   [--endpoints generate,chat,sessions,session]
+                                   [--latency fixed:50] [--error-rate 0]
+                                   [--malformed-rate 0] [--output results.json]
+
+Compare two commits with the same arguments and diff the "results".
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+PLATFORMS = ("linkedin", "instagram", "twitter")
+SEED_BATCH = 10000
+SAMPLE_IDS = 1000
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def fake_session(session_id, created_at):
+    from mock_groq import CONTENT
+    return {
+        "session_id": session_id,
+        "platform": random.choice(PLATFORMS),
+        "topic": f"topic {random.randrange(100000)}",
+        "audience": "developers",
+        "tone": "casual",
+        "content": CONTENT,
+        "created_at": created_at,
+        "updated_at": created_at
+    }
+
+def seed_store(store_dir, size, backend_name):
+    """Session store with `size` sessions; returns a sample of their ids"""
+    from storage import JSONFileBackend, SQLiteBackend
+
+    data_dir = store_dir / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    ids_file = store_dir / "ids.json"
+    if ids_file.exists():
+        return json.loads(ids_file.read_text())
+
+    if backend_name == "sqlite":
+        backend = SQLiteBackend(data_dir / "sessions.db", data_dir)
+    else:
+        backend = JSONFileBackend(data_dir)
+
+    started = time.perf_counter()
+    base = datetime.now() - timedelta(seconds=size)
+    sample = []
+    for offset in range(0, size, SEED_BATCH):
+        batch = []
+        for i in range(offset, min(size, offset + SEED_BATCH)):
+            session_id = str(uuid.uuid4())
+            batch.append((session_id, fake_session(session_id, (base + timedelta(seconds=i)).isoformat())))
+            if len(sample) < SAMPLE_IDS:
+                sample.append(session_id)
+        backend.save_many(batch)
+    backend.close()
+    print(f"seeded {size} sessions in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    ids_file.write_text(json.dumps(sample))
+    return sample
+
+def wait_until_up(url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise Exception(f"{url} exited with code {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise Exception(f"{url} did not start within {timeout}s")
+
+def start_mock(args, port):
+    process = subprocess.Popen([
+        sys.executable, str(ROOT / "benchmarks" / "mock_groq.py"), "--port", str(port),
+        "--latency", args.latency, "--error-rate", str(args.error_rate),
+        "--error-status", str(args.error_status), "--malformed-rate", str(args.malformed_rate)
+    ])
+    wait_until_up(f"http://127.0.0.1:{port}/stats", process)
+    return process
+
+def start_api(store_dir, port, mock_port, backend_name):
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ROOT),
+        "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "mock"),
+        "GROQ_BASE_URL": f"http://127.0.0.1:{mock_port}/openai/v1",
+        "STORAGE_BACKEND": backend_name,
+        "STORAGE_PATH": "data/sessions.db",
+        # Every /generate should reach the (mock) upstream, unthrottled
+        "CACHE_ENABLED": "false",
+        "GROQ_RPM_LIMIT": os.environ.get("GROQ_RPM_LIMIT", "0"),
+        "GROQ_TPM_LIMIT": os.environ.get("GROQ_TPM_LIMIT", "0"),
+        # Nothing here hits /search: keep the index build out of the measured runs
+        "SEARCH_ENABLED": os.environ.get("SEARCH_ENABLED", "false")
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=store_dir, env=env
+    )
+    wait_until_up(f"http://127.0.0.1:{port}/", process)
+    return process
+
+def make_request(endpoint, session_ids):
+    """(method, path, json body) for one request to endpoint"""
+    if endpoint == "generate":
+        body = {"platform": random.choice(PLATFORMS), "topic": f"load test {uuid.uuid4().hex[:8]}",
+                "audience": "developers", "tone": "casual", "bypass_cache": True}
+        return "POST", "/generate", body
+    if endpoint == "chat":
+        return "POST", "/chat", {"session_id": random.choice(session_ids), "message": "Make the CTA shorter"}
+    if endpoint == "sessions":
+        params = f"?limit=50&platform={random.choice(PLATFORMS)}" if random.random() < 0.5 else "?limit=50"
+        return "GET", "/sessions" + params, None
+    if endpoint == "session":
+        return "GET", f"/sessions/{random.choice(session_ids)}", None
+    raise ValueError(f"Unknown endpoint: {endpoint}")
+
+async def run_level(base_url, endpoint, concurrency, total, session_ids):
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                method, path, body = make_request(endpoint, session_ids)
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append((time.perf_counter() - started) * 1000)
+                errors += not ok
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "mean_ms": sum(latencies) / len(latencies),
+        "throughput_rps": total / elapsed
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10,1000,100000,1000000", help="session store sizes")
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint and concurrency level")
+    parser.add_argument("--endpoints", default="generate,chat,sessions,session")
+    parser.add_argument("--backend", choices=("sqlite", "json"), default="sqlite")
+    parser.add_argument("--workdir", default=str(Path(tempfile.gettempdir()) / "antisocial-loadtest"))
+    parser.add_argument("--latency", default="fixed:50", help="mock upstream latency spec (see mock_groq.py)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    levels = [int(level) for level in args.concurrency.split(",")]
+    endpoints = args.endpoints.split(",")
+    output = Path(args.output).resolve() if args.output else None
+
+    # storage.py creates its default store under the current directory on import
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    os.chdir(workdir)
+    sys.path.insert(0, str(ROOT))
+    sys.path.insert(0, str(ROOT / "benchmarks"))
+
+    mock_port = free_port()
+    mock = start_mock(args, mock_port)
+    results = []
+    try:
+        for size in sizes:
+            store_dir = workdir / f"{args.backend}-{size}"
+            session_ids = seed_store(store_dir, size, args.backend)
+            api_port = free_port()
+            api = start_api(store_dir, api_port, mock_port, args.backend)
+            try:
+                for endpoint in endpoints:
+                    for concurrency in levels:
+                        row = asyncio.run(run_level(
+                            f"http://127.0.0.1:{api_port}", endpoint, concurrency, args.requests, session_ids
+                        ))
+                        row["store_size"] = size
+                        results.append(row)
+                        print(f"size {size:>8} {endpoint:9} c={concurrency:<3} p50 {row['p50_ms']:8.1f} ms "
+                              f"p99 {row['p99_ms']:8.1f} ms {row['throughput_rps']:8.1f} req/s "
+                              f"errors {row['errors']}", file=sys.stderr)
+            finally:
+                api.terminate()
+                api.wait()
+        mock_stats = httpx.get(f"http://127.0.0.1:{mock_port}/stats").json()
+    finally:
+        mock.terminate()
+        mock.wait()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "config": {
+            "backend": args.backend,
+            "requests": args.requests,
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "error_status": args.error_status,
+            "malformed_rate": args.malformed_rate
+        },
+        "mock": mock_stats,
+        "results": results
+    }
+    text = json.dumps(report, indent=2)
+    if output:
+        output.write_text(text)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
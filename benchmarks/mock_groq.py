@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""OpenAI-compatible mock of the Groq chat-completions endpoint.
+
+Answers with valid content JSON (or patch ops for patch-mode chat
+prompts) after a simulated latency, and can inject upstream errors and
+malformed responses. Point the API at it with
+GROQ_BASE_URL=http://127.0.0.1:<port>/openai/v1.
+
+    python benchmarks/mock_groq.py [--port 9100] [--latency lognormal:800:0.4]
+                                   [--error-rate 0.01] [--error-status 500]
+                                   [--malformed-rate 0.02]
+
+Latency specs are in milliseconds: fixed:MS, uniform:MIN:MAX or
+lognormal:MEDIAN:SIGMA.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+CONTENT = {
+    "trending_angles": [f"Angle {i}: what most people get wrong" for i in range(1, 7)],
+    "hashtags": ["#AI", "#Growth", "#Leadership", "#Productivity", "#Tech"],
+    "post_blueprints": [
+        {
+            "hook": f"Hook {i}: a question that stops the scroll",
+            "outline": ["Context", "Insight", "Example"],
+            "cta": "What's your take?"
+        }
+        for i in range(1, 4)
+    ]
+}
+PATCH = {"message": "Shorter CTA", "ops": [{"op": "edit_blueprint", "index": 1, "field": "cta", "value": "Agree?"}]}
+
+def parse_latency(spec):
+    """Latency spec -> function returning one sample in seconds"""
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(":") if value]
+    if kind == "fixed":
+        return lambda: values[0] / 1000
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal":
+        median, sigma = values[0] / 1000, values[1]
+        return lambda: random.lognormvariate(math.log(median), sigma)
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+class MockSettings:
+    def __init__(self, latency="fixed:0", error_rate=0.0, error_status=500, malformed_rate=0.0):
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.malformed_rate = malformed_rate
+        self.requests = 0
+        self.errors = 0
+        self.malformed = 0
+
+settings = MockSettings()
+app = FastAPI(title="Mock Groq")
+
+def _reply_text(body):
+    """Content JSON for generation/full chat, ops for patch-mode chat"""
+    prompt = " ".join(str(message.get("content", "")) for message in body.get("messages", []))
+    reply = PATCH if '"ops"' in prompt else CONTENT
+    text = json.dumps(reply)
+    if random.random() < settings.malformed_rate:
+        settings.malformed += 1
+        # Cut the object in half: recoverable or not depending on where it lands
+        return "Sure! Here is the content:\n" + text[:len(text) // 2]
+    return text
+
+def _usage(body, text):
+    prompt = sum(len(str(message.get("content", ""))) for message in body.get("messages", []))
+    return {
+        "prompt_tokens": prompt // 4,
+        "completion_tokens": len(text) // 4,
+        "total_tokens": (prompt + len(text)) // 4
+    }
+
+async def _stream(body, text):
+    created = int(time.time())
+    for i in range(0, len(text), 16):
+        chunk = {"id": "mock", "created": created, "model": body.get("model"),
+                 "choices": [{"index": 0, "delta": {"content": text[i:i + 16]}}]}
+        yield f"data: {json.dumps(chunk)}\n\n"
+    final = {"id": "mock", "created": created, "model": body.get("model"),
+             "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+             "x_groq": {"usage": _usage(body, text)}}
+    yield f"data: {json.dumps(final)}\n\n"
+    yield "data: [DONE]\n\n"
+
+@app.post("/openai/v1/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    settings.requests += 1
+    await asyncio.sleep(settings.sample_latency())
+
+    if random.random() < settings.error_rate:
+        settings.errors += 1
+        headers = {"retry-after": "1"} if settings.error_status == 429 else {}
+        return JSONResponse({"error": {"message": "mock error"}}, status_code=settings.error_status, headers=headers)
+
+    text = _reply_text(body)
+    if body.get("stream"):
+        return StreamingResponse(_stream(body, text), media_type="text/event-stream")
+
+    return {
+        "id": "mock",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": _usage(body, text)
+    }
+
+@app.get("/stats")
+def stats():
+    return {"requests": settings.requests, "errors": settings.errors, "malformed": settings.malformed}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", default="lognormal:800:0.4", help="fixed:MS, uniform:MIN:MAX or lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    global settings
+    settings = MockSettings(args.latency, args.error_rate, args.error_status, args.malformed_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from config import (
+    CACHE_ENABLED, CACHE_PATH, CACHE_TTL,
+    CACHE_MAX_MEMORY_ENTRIES, CACHE_MAX_DISK_ENTRIES
+)
+
+def _normalize(value):
+    """Lowercase and collapse whitespace so trivial variations share a key"""
+    return " ".join(str(value).lower().split())
+
+def make_cache_key(platform, topic, audience, tone, model, prompt_version):
+    """Stable cache key for a generation request"""
+    parts = [_normalize(platform), _normalize(topic), _normalize(audience),
+             _normalize(tone), model, prompt_version]
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """Generated content cache: hot entries in a memory LRU, the rest in SQLite on disk"""
+    def __init__(self, path, ttl, max_memory_entries, max_disk_entries, enabled=True):
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()  # key -> (expires_at, content json)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.db = None
+
+        if self.enabled:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self.db.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(accessed_at)")
+            self.db.commit()
+            self.disk_entries = self.db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def get(self, key):
+        """Return cached content for key, or None"""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry and entry[0] > now:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return json.loads(entry[1])
+            if entry:
+                del self.memory[key]
+
+            row = self.db.execute(
+                "SELECT content, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row and row[1] > now:
+                self.db.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+                self.db.commit()
+                self._remember(key, row[1], row[0])
+                self.disk_hits += 1
+                return json.loads(row[0])
+            if row:
+                self.db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.db.commit()
+                self.disk_entries -= 1
+
+            self.misses += 1
+            return None
+
+    def set(self, key, content):
+        """Store content in memory and on disk"""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        expires_at = now + self.ttl
+        content_json = json.dumps(content)
+        with self.lock:
+            self._remember(key, expires_at, content_json)
+            cursor = self.db.execute(
+                "INSERT OR IGNORE INTO cache (key, content, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, content_json, expires_at, now)
+            )
+            if cursor.rowcount:
+                self.disk_entries += 1
+            else:
+                self.db.execute(
+                    "UPDATE cache SET content = ?, expires_at = ?, accessed_at = ? WHERE key = ?",
+                    (content_json, expires_at, now, key)
+                )
+            if self.disk_entries > self.max_disk_entries:
+                self._evict_disk(now)
+            self.db.commit()
+
+    def _remember(self, key, expires_at, content_json):
+        self.memory[key] = (expires_at, content_json)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    def _evict_disk(self, now):
+        """Drop expired entries, then least recently used ones over the bound"""
+        self.db.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        self.disk_entries = self.db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        overflow = self.disk_entries - self.max_disk_entries
+        if overflow > 0:
+            self.db.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,)
+            )
+            self.disk_entries -= overflow
+
+    def clear(self):
+        """Remove every cached entry"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.memory.clear()
+            self.db.execute("DELETE FROM cache")
+            self.db.commit()
+            self.disk_entries = 0
+
+    def stats(self):
+        """Hit/miss counters and sizes"""
+        with self.lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self.memory),
+                "disk_entries": self.disk_entries if self.enabled else 0
+            }
+
+class _Flight:
+    __slots__ = ("event", "future", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.future = None
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Identical concurrent requests share one in-flight upstream call
+
+    The first caller for a key runs it; callers arriving while it is in
+    flight wait for its result instead of starting their own.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flights = {}
+        self.async_flights = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _join(self, flights, key, make):
+        with self.lock:
+            flight = flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = flights[key] = make()
+            self.leaders += 1
+            return flight, True
+
+    def do(self, key, func):
+        """Returns (result, shared) where shared means another caller's call was reused"""
+        flight, leader = self._join(self.flights, key, _Flight)
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = func()
+            return flight.result, False
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.event.set()
+
+    async def ado(self, key, func):
+        """Async version of do; func is a coroutine function"""
+        def make():
+            flight = _Flight()
+            flight.future = asyncio.get_running_loop().create_future()
+            return flight
+
+        flight, leader = self._join(self.async_flights, key, make)
+        future = flight.future
+        if not leader:
+            # shield: one waiter giving up must not cancel the shared call
+            return await asyncio.shield(future), True
+
+        try:
+            result = await func()
+            future.set_result(result)
+            return result, False
+        except asyncio.CancelledError:
+            future.set_exception(Exception("Shared generation was cancelled"))
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            # Mark the exception retrieved even if nobody else was waiting
+            if future.done() and not future.cancelled():
+                future.exception()
+            with self.lock:
+                del self.async_flights[key]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "in_flight": len(self.flights) + len(self.async_flights),
+                "upstream_calls": self.leaders,
+                "coalesced": self.coalesced
+            }
+
+# Global cache instance
+response_cache = ResponseCache(
+    CACHE_PATH,
+    ttl=CACHE_TTL,
+    max_memory_entries=CACHE_MAX_MEMORY_ENTRIES,
+    max_disk_entries=CACHE_MAX_DISK_ENTRIES,
+    enabled=CACHE_ENABLED
+)
+
+generate_flights = SingleFlight()
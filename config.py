@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -6,26 +7,111 @@ load_dotenv()
 
 # Simple configuration
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_MODEL = "llama-3.1-8b-instant"
-
-# Platform configurations
-PLATFORMS = {
-    "linkedin": {
-        "name": "LinkedIn",
-        "description": "Professional networking and B2B content",
-        "hashtag_count": "8-12 professional hashtags",
-        "focus": "Career insights, industry trends, thought leadership"
-    },
-    "instagram": {
-        "name": "Instagram", 
-        "description": "Visual storytelling and lifestyle content",
-        "hashtag_count": "15-25 discovery hashtags",
-        "focus": "Visual content, tutorials, behind-the-scenes"
-    },
-    "twitter": {
-        "name": "Twitter",
-        "description": "Real-time engagement and discussions",
-        "hashtag_count": "5-8 strategic hashtags", 
-        "focus": "Threads, quick insights, discussions"
-    }
-}
\ No newline at end of file
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+# OpenAI-compatible base URL (point at a mock server for load tests)
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+
+# Groq HTTP client (connection pooling / keep-alive)
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "30"))
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "100"))
+GROQ_MAX_KEEPALIVE = int(os.getenv("GROQ_MAX_KEEPALIVE", "20"))
+GROQ_KEEPALIVE_EXPIRY = float(os.getenv("GROQ_KEEPALIVE_EXPIRY", "60"))
+GROQ_HTTP2 = os.getenv("GROQ_HTTP2", "false").lower() == "true"
+
+# Client-side Groq rate limits (defaults: free tier of the default model; 0 disables).
+# Groq's limits are per minute, so by default a whole minute of quota may be used at once
+GROQ_RPM_LIMIT = int(os.getenv("GROQ_RPM_LIMIT", "30"))
+GROQ_TPM_LIMIT = int(os.getenv("GROQ_TPM_LIMIT", "6000"))
+GROQ_RATE_BURST_SECONDS = float(os.getenv("GROQ_RATE_BURST_SECONDS", "60"))
+GROQ_QUEUE_TIMEOUT = float(os.getenv("GROQ_QUEUE_TIMEOUT", "30"))
+GROQ_QUEUE_MAX = int(os.getenv("GROQ_QUEUE_MAX", "200"))
+
+# Retries for transient Groq errors (5xx, 429, timeouts) within one overall deadline
+GROQ_DEADLINE = float(os.getenv("GROQ_DEADLINE", "45"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "2"))
+GROQ_RETRY_BASE_DELAY = float(os.getenv("GROQ_RETRY_BASE_DELAY", "0.5"))
+GROQ_RETRY_MAX_DELAY = float(os.getenv("GROQ_RETRY_MAX_DELAY", "8"))
+
+# Hedged requests: resend once the first call is slower than the observed percentile
+GROQ_HEDGE = os.getenv("GROQ_HEDGE", "false").lower() == "true"
+GROQ_HEDGE_PERCENTILE = float(os.getenv("GROQ_HEDGE_PERCENTILE", "95"))
+GROQ_HEDGE_MIN_SAMPLES = int(os.getenv("GROQ_HEDGE_MIN_SAMPLES", "20"))
+
+# Model routing: comma-separated default models, plus optional JSON routes like
+# {"chat": ["m1", "m2"], "twitter:generate": ["m3"]} ("platform:call_type", "platform" or "call_type")
+GROQ_MODELS = [model.strip() for model in os.getenv("GROQ_MODELS", GROQ_MODEL).split(",") if model.strip()]
+GROQ_MODEL_ROUTES = json.loads(os.getenv("GROQ_MODEL_ROUTES", "{}"))
+# Optional USD per million [input, output] tokens per model, for the cost column of /debug/models
+GROQ_MODEL_PRICES = json.loads(os.getenv("GROQ_MODEL_PRICES", "{}"))
+ROUTER_WINDOW = int(os.getenv("ROUTER_WINDOW", "100"))
+ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", "5"))
+ROUTER_ERROR_THRESHOLD = float(os.getenv("ROUTER_ERROR_THRESHOLD", "0.5"))
+ROUTER_COOLDOWN = float(os.getenv("ROUTER_COOLDOWN", "30"))
+
+# Cascade: generate with the first (small) model, escalate when its output fails validation
+GROQ_CASCADE = os.getenv("GROQ_CASCADE", "false").lower() == "true"
+GROQ_CASCADE_MODELS = [
+    model.strip()
+    for model in os.getenv("GROQ_CASCADE_MODELS", "llama-3.1-8b-instant,llama-3.3-70b-versatile").split(",")
+    if model.strip()
+]
+
+# Session storage backend: "sqlite" (default) or "json" (one file per session)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sqlite").lower()
+STORAGE_PATH = os.getenv("STORAGE_PATH", "data/sessions.db")
+# Write-behind: save_session returns after the in-memory update, a background thread persists
+STORAGE_WRITE_BEHIND = os.getenv("STORAGE_WRITE_BEHIND", "false").lower() == "true"
+STORAGE_FLUSH_INTERVAL = float(os.getenv("STORAGE_FLUSH_INTERVAL", "0.05"))
+STORAGE_FLUSH_BATCH = int(os.getenv("STORAGE_FLUSH_BATCH", "100"))
+STORAGE_FSYNC = os.getenv("STORAGE_FSYNC", "false").lower() == "true"
+
+# In-memory session cache bounds (least recently used sessions are evicted)
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "10000"))
+SESSION_CACHE_MAX_BYTES = int(os.getenv("SESSION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Conversation logs are compacted to the last N messages (and half this size) once they exceed this size
+CONVERSATION_COMPACT_BYTES = int(os.getenv("CONVERSATION_COMPACT_BYTES", str(1024 * 1024)))
+CONVERSATION_KEEP_MESSAGES = int(os.getenv("CONVERSATION_KEEP_MESSAGES", "500"))
+
+# /generate latency budget in seconds: past it, provisional fallback content is returned
+# and the real result is written to the session later (0 waits for Groq)
+GENERATE_DEADLINE = float(os.getenv("GENERATE_DEADLINE", "10"))
+
+# Chat edits: "patch" asks the model for targeted edit ops, "full" regenerates everything
+CHAT_MODE = os.getenv("CHAT_MODE", "patch").lower()
+CHAT_FULL_MAX_TOKENS = 1500
+CHAT_PATCH_MAX_TOKENS = int(os.getenv("CHAT_PATCH_MAX_TOKENS", "600"))
+
+# Bump when prompts change so cached responses from old prompts are not reused
+PROMPT_VERSION = "2"
+
+# Response cache for generated content
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+CACHE_PATH = os.getenv("CACHE_PATH", "data/cache.db")
+CACHE_TTL = int(os.getenv("CACHE_TTL", "86400"))
+CACHE_MAX_MEMORY_ENTRIES = int(os.getenv("CACHE_MAX_MEMORY_ENTRIES", "1000"))
+CACHE_MAX_DISK_ENTRIES = int(os.getenv("CACHE_MAX_DISK_ENTRIES", "100000"))
+
+# Near-duplicate requests ("AI for students" / "AI for college students"): "seed" adds the
+# closest earlier generation to the prompt, "return" serves it without calling Groq
+NEAR_DUP_MODE = os.getenv("NEAR_DUP_MODE", "off").lower()
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.7"))
+NEAR_DUP_PATH = os.getenv("NEAR_DUP_PATH", "data/near_duplicates.jsonl")
+NEAR_DUP_MAX_ENTRIES = int(os.getenv("NEAR_DUP_MAX_ENTRIES", "1000000"))
+NEAR_DUP_POSTINGS = int(os.getenv("NEAR_DUP_POSTINGS", "128"))
+
+# Full-text session search (/search): inverted index updated on every save
+SEARCH_ENABLED = os.getenv("SEARCH_ENABLED", "true").lower() == "true"
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", "data/search_index.jsonl")
+SEARCH_PREFIX_TERMS = int(os.getenv("SEARCH_PREFIX_TERMS", "200"))
+
+# Responses at least this many bytes are gzipped when the client accepts it (0 disables)
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1000"))
+
+# Bulk campaign jobs
+JOBS_PATH = os.getenv("JOBS_PATH", "data/jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_ROWS = int(os.getenv("JOB_MAX_ROWS", "10000"))
+
+# Platform definitions (one JSON file per platform), loaded once by platform_registry
+PLATFORMS_DIR = os.getenv("PLATFORMS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "platforms"))
@@ -0,0 +1,108 @@
+import copy
+import json
+
+PATCH_INSTRUCTIONS = """Reply with ONLY JSON: {"message": "<one short sentence>", "ops": [...]}
+Include ops only for what the user asked to change. Indexes are 1-based (A1, B1) and always
+refer to the content as shown above, also after earlier ops in the same list.
+Ops: set_angles{value:[...]} add_angle{value} edit_angle{index,value} remove_angle{index}
+set_hashtags{value:[...]} add_hashtags{value:[...]} remove_hashtags{value:[...]}
+edit_blueprint{index,field:"hook"|"outline"|"cta",value} add_blueprint{value:{hook,outline,cta}} remove_blueprint{index}
+Example: {"message": "Shorter CTA", "ops": [{"op": "edit_blueprint", "index": 2, "field": "cta", "value": "..."}]}"""
+
+def _compact(value):
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+def serialize_content(content):
+    """Compact line-per-item view of content for prompts"""
+    lines = []
+    for i, angle in enumerate(content.get("trending_angles", []), 1):
+        lines.append(f"A{i}: {_compact(angle)}")
+
+    hashtags = content.get("hashtags", [])
+    if isinstance(hashtags, list):
+        hashtags = " ".join(str(tag) for tag in hashtags)
+    lines.append(f"H: {hashtags}")
+
+    for i, blueprint in enumerate(content.get("post_blueprints", []), 1):
+        if not isinstance(blueprint, dict):
+            lines.append(f"B{i}: {_compact(blueprint)}")
+            continue
+        lines.append(f"B{i}.hook: {_compact(blueprint.get('hook', ''))}")
+        outline = blueprint.get("outline", [])
+        if isinstance(outline, list):
+            outline = " | ".join(_compact(point) for point in outline)
+        lines.append(f"B{i}.outline: {outline}")
+        lines.append(f"B{i}.cta: {_compact(blueprint.get('cta', ''))}")
+
+    return "\n".join(lines)
+
+def _position(items, index):
+    """0-based position for a 1-based index, or None if out of range"""
+    if isinstance(index, int) and 1 <= index <= len(items):
+        return index - 1
+    return None
+
+def _as_tags(value):
+    if isinstance(value, str):
+        return value.split()
+    return [str(tag) for tag in value] if isinstance(value, list) else None
+
+def apply_patch(content, ops):
+    """Apply patch ops to a copy of content.
+
+    Returns (new_content, applied) where applied counts the ops that were
+    valid; invalid ops are skipped so one bad edit doesn't lose the rest.
+    Indexes refer to the content as it was sent, so removals are applied
+    last, highest index first, and don't shift the ops after them.
+    """
+    content = copy.deepcopy(content)
+    angles = content.setdefault("trending_angles", [])
+    blueprints = content.setdefault("post_blueprints", [])
+    hashtags = _as_tags(content.get("hashtags", [])) or []
+    removed_angles = set()
+    removed_blueprints = set()
+    applied = 0
+
+    for op in ops:
+        if not isinstance(op, dict):
+            continue
+        name = op.get("op")
+        value = op.get("value")
+        index = op.get("index")
+
+        if name == "set_angles" and isinstance(value, list):
+            angles[:] = value
+            removed_angles.clear()
+        elif name == "add_angle" and value:
+            angles.append(value)
+        elif name == "edit_angle" and value and _position(angles, index) is not None:
+            angles[_position(angles, index)] = value
+        elif name == "remove_angle" and _position(angles, index) is not None:
+            removed_angles.add(_position(angles, index))
+        elif name == "set_hashtags" and _as_tags(value):
+            hashtags = _as_tags(value)
+        elif name == "add_hashtags" and _as_tags(value):
+            hashtags += [tag for tag in _as_tags(value) if tag not in hashtags]
+        elif name == "remove_hashtags" and _as_tags(value):
+            removed = {tag.lower() for tag in _as_tags(value)}
+            hashtags = [tag for tag in hashtags if tag.lower() not in removed]
+        elif (name == "edit_blueprint" and op.get("field") in ("hook", "outline", "cta")
+              and _position(blueprints, index) is not None
+              and isinstance(blueprints[_position(blueprints, index)], dict)):
+            blueprints[_position(blueprints, index)][op["field"]] = value
+        elif name == "add_blueprint" and isinstance(value, dict):
+            blueprints.append(value)
+        elif name == "remove_blueprint" and _position(blueprints, index) is not None:
+            removed_blueprints.add(_position(blueprints, index))
+        else:
+            continue
+        applied += 1
+
+    for items, removed in ((angles, removed_angles), (blueprints, removed_blueprints)):
+        for position in sorted(removed, reverse=True):
+            del items[position]
+
+    content["hashtags"] = hashtags
+    return content, applied
@@ -1,9 +1,15 @@
+import time
 import streamlit as st
 import requests
 
 st.set_page_config(page_title="AntiSocial", page_icon="🧠", layout="wide")
 
 API_URL = "http://localhost:8000"
+SESSIONS_TTL = 30  # seconds; also cleared after generate/chat
+HISTORY_PAGE_SIZE = 20
+# Provisional (template) content is re-checked this often until the real result is in
+PROVISIONAL_POLL_SECONDS = 2
+PROVISIONAL_MAX_POLLS = 45
 
 # Session state
 if "session_id" not in st.session_state:
@@ -12,13 +18,22 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 if "content" not in st.session_state:
     st.session_state.content = None
+if "history_pages" not in st.session_state:
+    st.session_state.history_pages = 1
+if "provisional_polls" not in st.session_state:
+    st.session_state.provisional_polls = None
 
-def call_api(endpoint, method="GET", data=None):
+@st.cache_resource
+def http_session():
+    """One pooled keep-alive connection set shared by every rerun and user"""
+    return requests.Session()
+
+def call_api(endpoint, method="GET", data=None, params=None):
     try:
         if method == "POST":
-            response = requests.post(f"{API_URL}{endpoint}", json=data)
+            response = http_session().post(f"{API_URL}{endpoint}", json=data)
         else:
-            response = requests.get(f"{API_URL}{endpoint}")
+            response = http_session().get(f"{API_URL}{endpoint}", params=params)
         
         if response.status_code == 200:
             return response.json()
@@ -28,6 +43,55 @@ def call_api(endpoint, method="GET", data=None):
         st.error("Cannot connect to backend")
     return None
 
+@st.cache_resource
+def etag_cache():
+    """(endpoint, params) -> (ETag, body) of the last full response"""
+    return {}
+
+def _get_json(endpoint, params=None):
+    """GET that raises on failure, so a failed call is never cached
+
+    Revalidates with If-None-Match: an unchanged resource costs an empty 304.
+    """
+    key = (endpoint, tuple(sorted((params or {}).items())))
+    cached = etag_cache().get(key)
+    headers = {"If-None-Match": cached[0]} if cached else None
+    response = http_session().get(f"{API_URL}{endpoint}", params=params, headers=headers)
+    if response.status_code == 304 and cached:
+        return cached[1]
+    response.raise_for_status()
+    data = response.json()
+    if response.headers.get("ETag"):
+        etag_cache()[key] = (response.headers["ETag"], data)
+    return data
+
+@st.cache_data(show_spinner=False)
+def get_platforms():
+    """Platforms only change when the backend restarts: fetched once per process"""
+    return _get_json("/platforms")["platforms"]
+
+@st.cache_data(ttl=SESSIONS_TTL, show_spinner=False)
+def get_sessions_page(cursor=None):
+    params = {"limit": HISTORY_PAGE_SIZE}
+    if cursor:
+        params["cursor"] = cursor
+    return _get_json("/sessions", params)
+
+def load_history(pages):
+    """Sessions from the first `pages` pages, and whether there are more"""
+    sessions = []
+    cursor = None
+    for _ in range(pages):
+        page = get_sessions_page(cursor)
+        sessions.extend(page["sessions"])
+        cursor = page.get("next_cursor")
+        if not cursor:
+            break
+    return sessions, cursor is not None
+
+def sessions_changed():
+    get_sessions_page.clear()
+
 def display_content(content):
     st.subheader("📈 Trending Angles")
     for i, angle in enumerate(content["trending_angles"], 1):
@@ -81,18 +145,23 @@ with st.sidebar:
             st.session_state.session_id = None
             st.session_state.messages = []
             st.session_state.content = None
+            st.session_state.provisional_polls = None
             st.rerun()
     else:
         st.info("Generate content to start")
     
     st.divider()
     
-    # Load session history
-    sessions_data = call_api("/sessions")
-    if sessions_data and sessions_data["sessions"]:
+    # Load session history (cached; more pages only on request)
+    try:
+        history, has_more = load_history(st.session_state.history_pages)
+    except Exception:
+        history, has_more = [], False
+        st.error("Cannot load session history")
+    if history:
         st.subheader("📚 Session History")
         
-        for session in sessions_data["sessions"]:
+        for session in history:
             session_id = session["session_id"]
             platform = session["platform"].title()
             topic = session["topic"]
@@ -110,22 +179,26 @@ with st.sidebar:
                     if session_detail:
                         st.session_state.session_id = session_id
                         st.session_state.content = session_detail.get("content")
+                        st.session_state.provisional_polls = 0 if session_detail.get("provisional") else None
                         st.session_state.messages = [{
                             "role": "assistant",
                             "content": f"Loaded session: {topic} ({platform})"
                         }]
                         st.rerun()
+        
+        if has_more and st.button("⬇️ Load more"):
+            st.session_state.history_pages += 1
+            st.rerun()
     else:
         st.write("No previous sessions")
 
 # Get platforms
-platforms_data = call_api("/platforms")
-if not platforms_data:
+try:
+    platforms = get_platforms()
+except Exception:
     st.error("Backend not available")
     st.stop()
 
-platforms = platforms_data["platforms"]
-
 # Main content
 if not st.session_state.session_id:
     # Generate form
@@ -155,8 +228,11 @@ if not st.session_state.session_id:
                     })
                     
                     if result:
+                        sessions_changed()
                         st.session_state.session_id = result["session_id"]
                         st.session_state.content = result
+                        # Past the backend's deadline: template content now, the real result later
+                        st.session_state.provisional_polls = 0 if result.get("provisional") else None
                         st.session_state.messages = [{
                             "role": "assistant",
                             "content": f"Generated content for '{topic}' on {platform_name}!"
@@ -206,6 +282,7 @@ else:
             })
             
             if response:
+                sessions_changed()
                 st.session_state.messages.append({
                     "role": "assistant",
                     "content": response["message"]
@@ -213,6 +290,7 @@ else:
                 
                 if response.get("updated_content"):
                     st.session_state.content = response["updated_content"]
+                    st.session_state.provisional_polls = None
                     # Show success message
                     st.success("🎉 Content updated! Check the updated content below.")
                 
@@ -222,9 +300,28 @@ else:
     if st.session_state.content:
         st.divider()
         st.header("📊 Current Content")
+        if st.session_state.provisional_polls is not None:
+            st.info("⏳ Showing template content while the AI result is still being generated...")
         
         # Debug section (can be removed later)
         with st.expander("🔍 Debug - Raw Content Structure"):
             st.json(st.session_state.content)
         
-        display_content(st.session_state.content)
\ No newline at end of file
+        display_content(st.session_state.content)
+    
+    # Provisional content: poll the session (If-None-Match, so mostly empty 304s) until the real result is in
+    if st.session_state.provisional_polls is not None:
+        if st.session_state.provisional_polls >= PROVISIONAL_MAX_POLLS:
+            st.session_state.provisional_polls = None
+        else:
+            time.sleep(PROVISIONAL_POLL_SECONDS)
+            st.session_state.provisional_polls += 1
+            try:
+                session_detail = _get_json(f"/sessions/{st.session_state.session_id}")
+            except Exception:
+                session_detail = None
+            if session_detail and not session_detail.get("provisional"):
+                st.session_state.content = session_detail.get("content")
+                st.session_state.provisional_polls = None
+                sessions_changed()
+            st.rerun()
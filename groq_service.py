@@ -1,54 +1,537 @@
-import requests
+import asyncio
+import httpx
 import json
-from config import GROQ_API_KEY, GROQ_MODEL
+import random
+import threading
+import time
+from collections import deque
+from json_parser import extract_json
+from metrics import GROQ_RETRIES, GROQ_HEDGES, RATE_LIMIT_WAIT, RATE_LIMIT_REJECTED, observe_groq
+from rate_limiter import RateLimiter, RateLimitError, estimate_tokens
+from model_router import ModelRouter
+from config import (
+    GROQ_API_KEY, GROQ_MODEL, GROQ_BASE_URL, GROQ_TIMEOUT, GROQ_MAX_CONNECTIONS,
+    GROQ_MAX_KEEPALIVE, GROQ_KEEPALIVE_EXPIRY, GROQ_HTTP2, GROQ_RPM_LIMIT, GROQ_TPM_LIMIT,
+    GROQ_RATE_BURST_SECONDS, GROQ_QUEUE_TIMEOUT, GROQ_QUEUE_MAX, GROQ_DEADLINE, GROQ_MAX_RETRIES,
+    GROQ_RETRY_BASE_DELAY, GROQ_RETRY_MAX_DELAY, GROQ_HEDGE, GROQ_HEDGE_PERCENTILE, GROQ_HEDGE_MIN_SAMPLES,
+    GROQ_MODELS, GROQ_MODEL_ROUTES, GROQ_MODEL_PRICES, ROUTER_WINDOW, ROUTER_MIN_SAMPLES,
+    ROUTER_ERROR_THRESHOLD, ROUTER_COOLDOWN
+)
 
-def call_groq(messages, max_tokens=2000):
-    """Simple Groq API call"""
+GROQ_URL = f"{GROQ_BASE_URL.rstrip('/')}/chat/completions"
+
+class ClientStats:
+    """Connect time and time-to-first-byte counters for the Groq client"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.connect_ms_total = 0.0
+        self.ttfb_ms_total = 0.0
+        self.last_connect_ms = None
+        self.last_ttfb_ms = None
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record(self, connect_ms, ttfb_ms):
+        with self.lock:
+            self.requests += 1
+            if connect_ms is not None:
+                self.new_connections += 1
+                self.connect_ms_total += connect_ms
+                self.last_connect_ms = connect_ms
+            if ttfb_ms is not None:
+                self.ttfb_ms_total += ttfb_ms
+                self.last_ttfb_ms = ttfb_ms
+
+    def record_retry(self):
+        with self.lock:
+            self.retries += 1
+
+    def record_hedge(self, won):
+        with self.lock:
+            self.hedges += 1
+            self.hedge_wins += won
+
+    def snapshot(self):
+        with self.lock:
+            reused = self.requests - self.new_connections
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused_connections": reused,
+                "avg_connect_ms": self.connect_ms_total / self.new_connections if self.new_connections else 0.0,
+                "avg_ttfb_ms": self.ttfb_ms_total / self.requests if self.requests else 0.0,
+                "last_connect_ms": self.last_connect_ms,
+                "last_ttfb_ms": self.last_ttfb_ms,
+                "retries": self.retries,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins
+            }
+
+class LatencyWindow:
+    """Recent successful call latencies per call type, for the hedging delay"""
+    def __init__(self, size=200):
+        self.lock = threading.Lock()
+        self.size = size
+        self.samples = {}
+
+    def add(self, call_type, seconds):
+        with self.lock:
+            self.samples.setdefault(call_type, deque(maxlen=self.size)).append(seconds)
+
+    def percentile(self, call_type, pct, min_samples):
+        """pct-th percentile in seconds, or None until min_samples calls were seen"""
+        with self.lock:
+            samples = sorted(self.samples.get(call_type, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+class RequestTimer:
+    """httpx trace hook splitting connection setup from time-to-first-byte"""
+    def __init__(self):
+        self.connect_started_at = None
+        self.request_sent_at = None
+        self.connect_ms = None
+        self.ttfb_ms = None
+
+    def __call__(self, event_name, info):
+        now = time.perf_counter()
+        if event_name == "connection.connect_tcp.started":
+            self.connect_started_at = now
+        elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+            # TLS completes after TCP, so the last event wins
+            if self.connect_started_at is not None:
+                self.connect_ms = (now - self.connect_started_at) * 1000
+        elif event_name.endswith(".send_request_headers.started"):
+            self.request_sent_at = now
+        elif event_name.endswith(".receive_response_headers.complete"):
+            if self.request_sent_at is not None:
+                self.ttfb_ms = (now - self.request_sent_at) * 1000
+
+class AsyncRequestTimer(RequestTimer):
+    """Same as RequestTimer, the async client awaits its trace hook"""
+    async def __call__(self, event_name, info):
+        RequestTimer.__call__(self, event_name, info)
+
+client_stats = ClientStats()
+latency_window = LatencyWindow()
+model_router = ModelRouter(
+    GROQ_MODELS, GROQ_MODEL_ROUTES, window=ROUTER_WINDOW, min_samples=ROUTER_MIN_SAMPLES,
+    error_threshold=ROUTER_ERROR_THRESHOLD, cooldown=ROUTER_COOLDOWN, prices=GROQ_MODEL_PRICES
+)
+rate_limiter = RateLimiter(
+    GROQ_RPM_LIMIT, GROQ_TPM_LIMIT, GROQ_RATE_BURST_SECONDS, GROQ_QUEUE_TIMEOUT, GROQ_QUEUE_MAX
+)
+
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+def _http2_enabled():
+    """HTTP/2 is optional and needs the h2 package"""
+    if not GROQ_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        print("GROQ_HTTP2 is set but 'h2' is not installed, falling back to HTTP/1.1")
+        return False
+    return True
+
+def _client_options():
+    return {
+        "limits": httpx.Limits(
+            max_connections=GROQ_MAX_CONNECTIONS,
+            max_keepalive_connections=GROQ_MAX_KEEPALIVE,
+            keepalive_expiry=GROQ_KEEPALIVE_EXPIRY
+        ),
+        "timeout": GROQ_TIMEOUT,
+        "http2": _http2_enabled()
+    }
+
+def get_client():
+    """Shared pooled client (keep-alive connections are reused across calls)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(**_client_options())
+    return _client
+
+def get_async_client():
+    """Shared pooled client for the async request path"""
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                _async_client = httpx.AsyncClient(**_client_options())
+    return _async_client
+
+def close_client():
+    """Close pooled connections (call on shutdown)"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+async def close_async_client():
+    """Close the async client's pooled connections (call on shutdown)"""
+    global _async_client
+    with _client_lock:
+        client, _async_client = _async_client, None
+    if client is not None:
+        await client.aclose()
+
+def _build_request(messages, max_tokens, stream=False, model=GROQ_MODEL):
     if not GROQ_API_KEY:
         raise Exception("GROQ_API_KEY not found")
-    
+
     headers = {
         "Authorization": f"Bearer {GROQ_API_KEY}",
         "Content-Type": "application/json"
     }
-    
+
     data = {
-        "model": GROQ_MODEL,
+        "model": model,
         "messages": messages,
         "temperature": 0.7,
         "max_tokens": max_tokens
     }
-    
-    response = requests.post(
-        "https://api.groq.com/openai/v1/chat/completions",
-        headers=headers,
-        json=data,
-        timeout=30
-    )
-    
+    if stream:
+        data["stream"] = True
+
+    return headers, data
+
+class GroqAPIError(Exception):
+    """Non-200 answer from Groq (429 is reported as RateLimitError)"""
+    def __init__(self, status_code):
+        super().__init__(f"Groq API error: {status_code}")
+        self.status_code = status_code
+
+class _Call:
+    """One logical call_groq/acall_groq invocation across its attempts and models"""
+    def __init__(self, messages, max_tokens, stream, platform, call_type, model=None, lane=None):
+        self.models = [model] if model else model_router.candidates(platform, call_type)
+        self.model_index = 0
+        self.headers, self.data = _build_request(messages, max_tokens, stream, self.models[0])
+        self.labels = (platform, call_type)
+        self.lane = lane or call_type
+        self.cost = estimate_tokens(messages, max_tokens)
+        self.deadline = time.monotonic() + GROQ_DEADLINE
+        self.retries = 0
+
+    @property
+    def model(self):
+        return self.models[self.model_index]
+
+    def fall_back(self, error):
+        """Switch to the next routed model after an upstream failure; False if none is left"""
+        upstream = _retry_reason(error) is not None or isinstance(error, GroqAPIError)
+        if not upstream or self.model_index + 1 >= len(self.models):
+            return False
+        model_router.record_fallback(self.model)
+        print(f"Groq model {self.model} failed ({error}), falling back to {self.models[self.model_index + 1]}")
+        self.model_index += 1
+        self.data["model"] = self.model
+        return True
+
+    def timeout(self):
+        """Per-attempt timeout: GROQ_TIMEOUT, cut short by the overall deadline"""
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise Exception(f"Groq deadline of {GROQ_DEADLINE:g}s exceeded")
+        return min(GROQ_TIMEOUT, remaining)
+
+def _acquire(cost, lane):
+    """Queue for rate-limit capacity (raises RateLimitError past GROQ_QUEUE_TIMEOUT)"""
+    try:
+        RATE_LIMIT_WAIT.labels(lane).observe(rate_limiter.acquire(cost, lane))
+    except RateLimitError:
+        RATE_LIMIT_REJECTED.labels(lane).inc()
+        raise
+
+async def _aacquire(cost, lane):
+    try:
+        RATE_LIMIT_WAIT.labels(lane).observe(await rate_limiter.aacquire(cost, lane))
+    except RateLimitError:
+        RATE_LIMIT_REJECTED.labels(lane).inc()
+        raise
+
+def _check_status(response):
+    """Feed rate-limit headers back and raise on errors"""
+    rate_limiter.observe_headers(response.status_code, response.headers)
+    if response.status_code == 429:
+        raise RateLimitError("Groq API error: 429", retry_after=rate_limiter.retry_after(), status_code=429)
     if response.status_code != 200:
-        raise Exception(f"Groq API error: {response.status_code}")
-    
-    return response.json()["choices"][0]["message"]["content"]
+        raise GroqAPIError(response.status_code)
+
+def _observe(call, seconds, status, usage=None):
+    """Metrics and per-model routing stats for one attempt"""
+    observe_groq(*call.labels, call.model, seconds, status, usage)
+    model_router.record(call.model, seconds, status == 200, usage)
+
+def _settle(cost, usage):
+    rate_limiter.settle(cost, usage.get("total_tokens") if usage else None)
+
+def _handle_response(response, timer, call, started):
+    client_stats.record(timer.connect_ms, timer.ttfb_ms)
+    elapsed = time.perf_counter() - started
+
+    if response.status_code != 200:
+        _observe(call, elapsed, response.status_code)
+    _check_status(response)
+
+    body = response.json()
+    _observe(call, elapsed, 200, body.get("usage"))
+    latency_window.add(call.lane, elapsed)
+    _settle(call.cost, body.get("usage"))
+    return body["choices"][0]["message"]["content"]
+
+def _retry_reason(error):
+    """Label for a transient error worth retrying, None for anything else"""
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(error, httpx.TransportError):
+        return "transport"
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None and (status_code == 429 or status_code >= 500):
+        return str(status_code)
+    return None
+
+def _retry_delay(error, call):
+    """Seconds to wait before the next attempt (0 to fall back to another model), or None to give up"""
+    if call.fall_back(error):
+        return 0.0
+    reason = _retry_reason(error)
+    if reason is None or call.retries >= GROQ_MAX_RETRIES:
+        return None
+    # Full jitter keeps clients that failed together from retrying together
+    delay = random.uniform(0, min(GROQ_RETRY_MAX_DELAY, GROQ_RETRY_BASE_DELAY * 2 ** call.retries))
+    delay = max(delay, getattr(error, "retry_after", None) or 0)
+    if time.monotonic() + delay >= call.deadline:
+        return None
+    GROQ_RETRIES.labels(call.lane, reason).inc()
+    client_stats.record_retry()
+    call.retries += 1
+    print(f"Retrying Groq call in {delay:.2f}s after {reason} (retry {call.retries})")
+    return delay
+
+def _parse_stream_line(line):
+    """Return (text delta, usage) of one server-sent event line"""
+    if not line.startswith("data:"):
+        return None, None
+    payload = line[5:].strip()
+    if not payload or payload == "[DONE]":
+        return None, None
+    event = json.loads(payload)
+    # Groq reports usage on the last chunk under x_groq
+    usage = event.get("usage") or (event.get("x_groq") or {}).get("usage")
+    choices = event.get("choices") or [{}]
+    return choices[0].get("delta", {}).get("content"), usage
+
+def call_groq(messages, max_tokens=2000, stream=False, platform="unknown", call_type="generate", model=None,
+              lane=None):
+    """Simple Groq API call
+
+    With stream=True returns a generator of text deltas instead of the full text.
+    platform and call_type pick the routed models (unless model is given) and the
+    rate-limit lane ("chat" goes first; lane overrides it, e.g. "bulk" for jobs
+    routed like "generate"). Failed models fall back to the next routed
+    one; transient errors are retried with backoff, all within GROQ_DEADLINE.
+    """
+    call = _Call(messages, max_tokens, stream, platform, call_type, model, lane)
+    if stream:
+        return _stream_groq(call)
+
+    while True:
+        try:
+            return _send(call)
+        except Exception as e:
+            delay = _retry_delay(e, call)
+            if delay is None:
+                raise
+            time.sleep(delay)
+
+def _send(call):
+    _acquire(call.cost, call.lane)
+    timer = RequestTimer()
+    started = time.perf_counter()
+    try:
+        response = get_client().post(
+            GROQ_URL,
+            headers=call.headers,
+            json=call.data,
+            timeout=call.timeout(),
+            extensions={"trace": timer}
+        )
+    except Exception:
+        _observe(call, time.perf_counter() - started, "error")
+        raise
+
+    return _handle_response(response, timer, call, started)
+
+def _stream_groq(call):
+    """Retries only until the first delta; after that a failure ends the stream"""
+    while True:
+        streamed = False
+        try:
+            for delta in _stream_once(call):
+                streamed = True
+                yield delta
+            return
+        except Exception as e:
+            delay = None if streamed else _retry_delay(e, call)
+            if delay is None:
+                raise
+            time.sleep(delay)
+
+def _stream_once(call):
+    _acquire(call.cost, call.lane)
+    timer = RequestTimer()
+    started = time.perf_counter()
+    status, usage = "error", None
+    try:
+        with get_client().stream("POST", GROQ_URL, headers=call.headers, json=call.data,
+                                 timeout=call.timeout(), extensions={"trace": timer}) as response:
+            client_stats.record(timer.connect_ms, timer.ttfb_ms)
+            status = response.status_code
+            _check_status(response)
+
+            for line in response.iter_lines():
+                delta, line_usage = _parse_stream_line(line)
+                usage = line_usage or usage
+                if delta:
+                    yield delta
+    finally:
+        _observe(call, time.perf_counter() - started, status, usage)
+        _settle(call.cost, usage)
+
+async def acall_groq(messages, max_tokens=2000, stream=False, platform="unknown", call_type="generate", model=None,
+                     lane=None):
+    """Async Groq API call (does not block the event loop while waiting)
+
+    With stream=True returns an async generator of text deltas. With GROQ_HEDGE
+    a second request is sent if the first is slower than the observed p95.
+    """
+    call = _Call(messages, max_tokens, stream, platform, call_type, model, lane)
+    if stream:
+        return _astream_groq(call)
+
+    while True:
+        try:
+            if GROQ_HEDGE:
+                return await _ahedged(call)
+            return await _asend(call)
+        except Exception as e:
+            delay = _retry_delay(e, call)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+
+async def _asend(call, acquire=True):
+    if acquire:
+        await _aacquire(call.cost, call.lane)
+    timer = AsyncRequestTimer()
+    started = time.perf_counter()
+    try:
+        response = await get_async_client().post(
+            GROQ_URL,
+            headers=call.headers,
+            json=call.data,
+            timeout=call.timeout(),
+            extensions={"trace": timer}
+        )
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        _observe(call, time.perf_counter() - started, "error")
+        raise
+
+    return _handle_response(response, timer, call, started)
+
+async def _ahedged(call):
+    """Send once; if no answer by the observed p95, send a second copy and take the first answer"""
+    first = asyncio.ensure_future(_asend(call))
+    delay = latency_window.percentile(call.lane, GROQ_HEDGE_PERCENTILE, GROQ_HEDGE_MIN_SAMPLES)
+    if delay is None:
+        return await first
+
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done:
+        return first.result()
+
+    # The hedge only goes out on spare capacity, never by queueing behind others
+    if not rate_limiter.try_acquire(call.cost):
+        GROQ_HEDGES.labels(call.lane, "skipped").inc()
+        return await first
+    GROQ_HEDGES.labels(call.lane, "sent").inc()
+    hedge = asyncio.ensure_future(_asend(call, acquire=False))
+
+    pending = {first, hedge}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    won = task is hedge
+                    client_stats.record_hedge(won)
+                    if won:
+                        GROQ_HEDGES.labels(call.lane, "won").inc()
+                    return task.result()
+        # Both failed: report the original request's error
+        client_stats.record_hedge(False)
+        return first.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def _astream_groq(call):
+    while True:
+        streamed = False
+        try:
+            async for delta in _astream_once(call):
+                streamed = True
+                yield delta
+            return
+        except Exception as e:
+            delay = None if streamed else _retry_delay(e, call)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+
+async def _astream_once(call):
+    await _aacquire(call.cost, call.lane)
+    timer = AsyncRequestTimer()
+    started = time.perf_counter()
+    status, usage = "error", None
+    try:
+        async with get_async_client().stream("POST", GROQ_URL, headers=call.headers, json=call.data,
+                                             timeout=call.timeout(), extensions={"trace": timer}) as response:
+            client_stats.record(timer.connect_ms, timer.ttfb_ms)
+            status = response.status_code
+            _check_status(response)
+
+            async for line in response.aiter_lines():
+                delta, line_usage = _parse_stream_line(line)
+                usage = line_usage or usage
+                if delta:
+                    yield delta
+    finally:
+        _observe(call, time.perf_counter() - started, status, usage)
+        _settle(call.cost, usage)
 
 def parse_json_response(content):
     """Parse JSON from AI response with fallback"""
-    try:
-        # Try to find JSON in the response
-        start = content.find('{')
-        end = content.rfind('}') + 1
-        
-        if start != -1 and end > start:
-            json_str = content[start:end]
-            parsed = json.loads(json_str)
-            
-            # Validate that it has the required fields
-            if ("trending_angles" in parsed and 
-                "hashtags" in parsed and 
-                "post_blueprints" in parsed):
-                return parsed
-    except Exception as e:
-        print(f"JSON parsing error: {e}")
+    parsed = extract_json(content)
     
     # Return None if parsing failed (don't return fallback for modifications)
-    return None
\ No newline at end of file
+    if parsed is None:
+        print("JSON parsing error: no valid content object in response")
+    return parsed
\ No newline at end of file
@@ -0,0 +1,291 @@
+import asyncio
+import csv
+import io
+import json
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from config import JOBS_PATH, JOB_WORKERS, JOB_MAX_ROWS
+from platform_registry import platforms
+from rate_limiter import RateLimitError
+
+ROW_FIELDS = ("platform", "topic", "audience", "tone")
+
+def parse_rows(body, content_type):
+    """Campaign rows from a CSV body or a JSON list (optionally {"rows": [...]})
+
+    Raises ValueError with every invalid row listed.
+    """
+    if "csv" in (content_type or ""):
+        reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+        rows = [{(key or "").strip().lower(): (value or "").strip() for key, value in row.items()}
+                for row in reader]
+    else:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise ValueError("Body must be CSV (Content-Type: text/csv) or a JSON list of rows")
+        rows = data.get("rows") if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            raise ValueError("JSON body must be a list of rows or {\"rows\": [...]}")
+
+    if not rows:
+        raise ValueError("No rows")
+    if len(rows) > JOB_MAX_ROWS:
+        raise ValueError(f"Too many rows ({len(rows)} > {JOB_MAX_ROWS})")
+
+    errors = []
+    clean = []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append(f"row {index}: not an object")
+            continue
+        row = {field: str(row.get(field) or "").strip() for field in ROW_FIELDS}
+        missing = [field for field in ROW_FIELDS if not row[field]]
+        if missing:
+            errors.append(f"row {index}: missing {', '.join(missing)}")
+        elif row["platform"] not in platforms:
+            errors.append(f"row {index}: invalid platform {row['platform']!r}")
+        clean.append(row)
+    if errors:
+        raise ValueError("; ".join(errors[:20]))
+    return clean
+
+class JobStore:
+    """Jobs and their rows in SQLite, so unfinished rows survive a restart"""
+    def __init__(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                bypass_cache INTEGER NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS job_rows (
+                job_id TEXT NOT NULL,
+                row_index INTEGER NOT NULL,
+                platform TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                audience TEXT NOT NULL,
+                tone TEXT NOT NULL,
+                status TEXT NOT NULL,
+                seq INTEGER,
+                result TEXT,
+                PRIMARY KEY (job_id, row_index)
+            );
+            CREATE INDEX IF NOT EXISTS idx_job_rows_status ON job_rows(job_id, status);
+            CREATE INDEX IF NOT EXISTS idx_job_rows_seq ON job_rows(job_id, seq);
+        """)
+        self.db.commit()
+
+    def create(self, rows, bypass_cache):
+        job_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO jobs VALUES (?, 'queued', ?, ?, ?, ?)",
+                (job_id, len(rows), int(bypass_cache), now, now)
+            )
+            self.db.executemany(
+                "INSERT INTO job_rows VALUES (?, ?, ?, ?, ?, ?, 'pending', NULL, NULL)",
+                [(job_id, index, row["platform"], row["topic"], row["audience"], row["tone"])
+                 for index, row in enumerate(rows)]
+            )
+            self.db.commit()
+        return job_id
+
+    def pending(self):
+        """(job_id, row_index) of every unfinished row, oldest job first"""
+        with self.lock:
+            return self.db.execute("""
+                SELECT r.job_id, r.row_index FROM job_rows r JOIN jobs j ON j.job_id = r.job_id
+                WHERE r.status = 'pending' ORDER BY j.created_at, r.row_index
+            """).fetchall()
+
+    def row(self, job_id, row_index):
+        with self.lock:
+            row = self.db.execute("""
+                SELECT r.platform, r.topic, r.audience, r.tone, r.status, j.bypass_cache
+                FROM job_rows r JOIN jobs j ON j.job_id = r.job_id
+                WHERE r.job_id = ? AND r.row_index = ?
+            """, (job_id, row_index)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(ROW_FIELDS + ("status", "bypass_cache"), row))
+
+    def mark_running(self, job_id):
+        with self.lock:
+            self.db.execute(
+                "UPDATE jobs SET status = 'running', updated_at = ? WHERE job_id = ? AND status = 'queued'",
+                (datetime.now().isoformat(), job_id)
+            )
+            self.db.commit()
+
+    def finish_row(self, job_id, row_index, status, result):
+        """Record a finished row; returns True when it was the job's last one"""
+        now = datetime.now().isoformat()
+        with self.lock:
+            seq = self.db.execute(
+                "SELECT COALESCE(MAX(seq), 0) + 1 FROM job_rows WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+            self.db.execute(
+                "UPDATE job_rows SET status = ?, seq = ?, result = ? WHERE job_id = ? AND row_index = ?",
+                (status, seq, json.dumps(result), job_id, row_index)
+            )
+            remaining = self.db.execute(
+                "SELECT COUNT(*) FROM job_rows WHERE job_id = ? AND status = 'pending'", (job_id,)
+            ).fetchone()[0]
+            self.db.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?",
+                ("done" if remaining == 0 else "running", now, job_id)
+            )
+            self.db.commit()
+        return remaining == 0
+
+    def status(self, job_id):
+        with self.lock:
+            job = self.db.execute(
+                "SELECT status, total, created_at, updated_at FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+            counts = dict(self.db.execute(
+                "SELECT status, COUNT(*) FROM job_rows WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+        return {
+            "job_id": job_id,
+            "status": job[0],
+            "total": job[1],
+            "done": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+            "pending": counts.get("pending", 0),
+            "created_at": job[2],
+            "updated_at": job[3]
+        }
+
+    def results(self, job_id, after_seq):
+        """Finished rows with seq > after_seq, in completion order"""
+        with self.lock:
+            rows = self.db.execute("""
+                SELECT seq, row_index, platform, topic, audience, tone, status, result
+                FROM job_rows WHERE job_id = ? AND seq > ? ORDER BY seq
+            """, (job_id, after_seq)).fetchall()
+        return [
+            {
+                "seq": seq, "row": row_index, "platform": platform, "topic": topic,
+                "audience": audience, "tone": tone, "status": status, **json.loads(result)
+            }
+            for seq, row_index, platform, topic, audience, tone, status, result in rows
+        ]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+class JobManager:
+    """Bounded pool of async workers generating campaign rows
+
+    Rows go through the "bulk" rate-limit lane, so interactive requests keep
+    priority. Rows hit by the client-side rate limit are re-queued, not failed.
+    """
+    def __init__(self, store, workers):
+        self.store = store
+        self.workers = workers
+        # Rows submitted before start() wait here; start() re-queues them from the store
+        self.queue = asyncio.Queue()
+        self.tasks = []
+        self.changed = {}
+
+    async def start(self):
+        """Start the workers and queue every pending row (from a previous run, or submitted before now)"""
+        self.queue = asyncio.Queue()
+        for job_id, row_index in self.store.pending():
+            self.queue.put_nowait((job_id, row_index))
+        self.tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def submit(self, rows, bypass_cache=False):
+        job_id = self.store.create(rows, bypass_cache)
+        for row_index in range(len(rows)):
+            self.queue.put_nowait((job_id, row_index))
+        return job_id
+
+    def _notify(self, job_id):
+        event = self.changed.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def wait_for_change(self, job_id, timeout):
+        event = self.changed.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _work(self):
+        from agents import agents
+        while True:
+            job_id, row_index = await self.queue.get()
+            try:
+                await self._run_row(agents, job_id, row_index)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Job {job_id} row {row_index} crashed: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _run_row(self, agents, job_id, row_index):
+        row = self.store.row(job_id, row_index)
+        if row is None or row["status"] != "pending":
+            return
+        self.store.mark_running(job_id)
+
+        try:
+            result = await agents[row["platform"]].agenerate_content(
+                row["topic"], row["audience"], row["tone"],
+                use_cache=not row["bypass_cache"], lane="bulk"
+            )
+        except RateLimitError as e:
+            # Not a row failure: try again once capacity is back
+            await asyncio.sleep(e.retry_after or 1)
+            self.queue.put_nowait((job_id, row_index))
+            return
+        except Exception as e:
+            self.store.finish_row(job_id, row_index, "failed", {"error": str(e)})
+        else:
+            session_id = result.pop("session_id")
+            self.store.finish_row(job_id, row_index, "done", {"session_id": session_id, "content": result})
+        self._notify(job_id)
+
+    async def stream_results(self, job_id, after_seq=0, follow=True):
+        """NDJSON lines of finished rows; with follow, keeps going until the job is done"""
+        while True:
+            status = self.store.status(job_id)
+            for result in self.store.results(job_id, after_seq):
+                after_seq = result["seq"]
+                yield json.dumps(result) + "\n"
+            if not follow or status is None or status["status"] == "done":
+                return
+            await self.wait_for_change(job_id, timeout=5)
+
+    def stats(self):
+        return {
+            "workers": len(self.tasks),
+            "queued_rows": self.queue.qsize()
+        }
+
+job_manager = JobManager(JobStore(JOBS_PATH), JOB_WORKERS)
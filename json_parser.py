@@ -0,0 +1,273 @@
+import json
+import re
+
+CONTENT_FIELDS = ("trending_angles", "hashtags", "post_blueprints")
+
+class ContentStreamParser:
+    """Incrementally scan a streamed JSON completion and emit finished list items.
+
+    Feed text chunks as they arrive; every item of trending_angles, hashtags
+    and post_blueprints is returned as soon as its closing quote/brace is seen.
+    The scan is a single pass over the buffer, each character is visited once.
+    """
+    def __init__(self, fields=CONTENT_FIELDS):
+        self.fields = fields
+        self.buffer = ""
+        self.pos = 0
+        self.stack = []
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.last_key = None
+        self.field = None
+        self.item_start = None
+        self.counts = {}
+
+    def feed(self, text):
+        """Add a chunk and return a list of (field, index, value) for completed items"""
+        self.buffer += text
+        buf = self.buffer
+        items = []
+
+        for i in range(self.pos, len(buf)):
+            ch = buf[i]
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    if len(self.stack) == 1:
+                        self.last_key = buf[self.string_start:i + 1]
+                    elif self._at_item_level() and self.item_start == self.string_start:
+                        self._emit(items, i + 1)
+                continue
+
+            # Ignore any prose before the JSON object starts
+            if not self.stack and ch != "{":
+                continue
+
+            if ch == '"':
+                self.in_string = True
+                self.string_start = i
+                if self._at_item_level() and self.item_start is None:
+                    self.item_start = i
+            elif ch in "{[":
+                if self._at_item_level() and self.item_start is None:
+                    self.item_start = i
+                if ch == "[" and len(self.stack) == 1:
+                    self.field = self._decode_key()
+                self.stack.append(ch)
+            elif ch in "}]":
+                if self.stack:
+                    self.stack.pop()
+                if ch == "]" and len(self.stack) == 1:
+                    # Array closed, flush a trailing scalar item
+                    if self.item_start is not None and self.field is not None:
+                        self._emit(items, i)
+                    self.field = None
+                elif self._at_item_level() and self.item_start is not None:
+                    self._emit(items, i + 1)
+            elif ch == ",":
+                if self._at_item_level() and self.item_start is not None:
+                    self._emit(items, i)
+            elif not ch.isspace():
+                if self._at_item_level() and self.item_start is None:
+                    self.item_start = i
+
+        self.pos = len(buf)
+        return items
+
+    def _at_item_level(self):
+        return self.field is not None and len(self.stack) == 2 and self.stack[1] == "["
+
+    def _decode_key(self):
+        if self.last_key is None:
+            return None
+        try:
+            key = json.loads(self.last_key)
+        except ValueError:
+            return None
+        return key if key in self.fields else None
+
+    def _emit(self, items, end):
+        raw = self.buffer[self.item_start:end].strip()
+        self.item_start = None
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        index = self.counts.get(self.field, 0)
+        self.counts[self.field] = index + 1
+        items.append((self.field, index, value))
+
+# A stray "{" in prose swallows the real object; retry from the next brace this many times
+MAX_RESCANS = 8
+
+_CLOSERS = {"{": "}", "[": "]"}
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_TOKEN_RE = re.compile(r'[{}\[\]",:\\]')
+_REPAIR_RE = re.compile(
+    r'(?P<string>"(?:\\.|[^"\\])*")'
+    r'|//[^\n]*'
+    r'|/\*.*?\*/'
+    r'|,\s*(?P<closer>[}\]])'
+    r'|\b(?P<literal>True|False|None)\b',
+    re.S
+)
+
+def _scan_objects(text, offset=0):
+    """Yield (json_text, complete) for each top-level object in text[offset:].
+
+    Prose outside objects (including markdown code fences) is skipped.
+    An object still open at the end of the text is cut back to the last
+    complete value and closed, so a truncated completion keeps everything
+    that did arrive. Only structural characters are visited (via regex).
+    """
+    stack = []
+    start = None
+    in_string = False
+    escaped_at = -1
+    is_key = False
+    expect_key = False
+    safe_end = None
+    safe_stack = None
+
+    for match in _TOKEN_RE.finditer(text, offset):
+        i = match.start()
+        ch = text[i]
+
+        if in_string:
+            if i == escaped_at:
+                continue
+            if ch == "\\":
+                escaped_at = i + 1
+            elif ch == '"':
+                in_string = False
+                if not is_key:
+                    safe_end, safe_stack = i + 1, tuple(stack)
+            continue
+
+        if not stack:
+            if ch == "{":
+                start = i
+                stack.append(ch)
+                expect_key = True
+                safe_end = None
+            continue
+
+        if ch == '"':
+            in_string = True
+            is_key = stack[-1] == "{" and expect_key
+        elif ch in "{[":
+            stack.append(ch)
+            expect_key = ch == "{"
+        elif ch in "}]":
+            stack.pop()
+            expect_key = False
+            if not stack:
+                yield text[start:i + 1], True
+                start = None
+            else:
+                safe_end, safe_stack = i + 1, tuple(stack)
+        elif ch == ",":
+            if stack[-1] == "{":
+                expect_key = True
+            if safe_end is None or safe_end < i:
+                # A scalar value ends at the comma
+                safe_end, safe_stack = i, tuple(stack)
+        elif ch == ":":
+            expect_key = False
+
+    if start is not None and safe_end is not None:
+        closers = "".join(_CLOSERS[c] for c in reversed(safe_stack))
+        yield text[start:safe_end] + closers, False
+
+def _repair_match(match):
+    if match.group("string"):
+        return match.group("string")
+    if match.group("closer"):
+        return match.group("closer")
+    if match.group("literal"):
+        return _LITERALS[match.group("literal")]
+    return ""
+
+def _repair(json_text):
+    """Fix common model defects outside of strings: trailing commas,
+    // and /* */ comments, and Python literals (True/False/None)."""
+    return _REPAIR_RE.sub(_repair_match, json_text)
+
+def _loads(json_text):
+    try:
+        return json.loads(json_text, strict=False)
+    except ValueError:
+        pass
+    try:
+        return json.loads(_repair(json_text), strict=False)
+    except ValueError:
+        return None
+
+def _is_content(obj, required):
+    if not isinstance(obj, dict):
+        return False
+    for field in required:
+        value = obj.get(field)
+        if field == "hashtags":
+            if not isinstance(value, (list, str)):
+                return False
+        elif not isinstance(value, list):
+            return False
+    return True
+
+def _find_content(obj, required):
+    """The object itself or a directly nested object that matches the schema"""
+    if _is_content(obj, required):
+        return obj
+    if isinstance(obj, dict):
+        for value in obj.values():
+            if _is_content(value, required):
+                return value
+    return None
+
+def extract_json(text, required=CONTENT_FIELDS):
+    """Return the best schema-valid content object found in text, or None.
+
+    Handles prose around the JSON, code fences, several objects (for
+    example an echoed template followed by the real answer), trailing
+    commas, comments and truncated tails. Complete objects win over
+    repaired truncated ones, then the object with the most items wins.
+    """
+    # Fast path: a well-formed object between the first "{" and the last "}"
+    start = text.find("{")
+    end = text.rfind("}") + 1
+    if start != -1 and end > start:
+        try:
+            content = _find_content(json.loads(text[start:end], strict=False), required)
+        except ValueError:
+            content = None
+        if content is not None:
+            return content
+
+    offset = 0
+    for _ in range(MAX_RESCANS):
+        best = None
+        best_score = None
+
+        for json_text, complete in _scan_objects(text, offset):
+            content = _find_content(_loads(json_text), required)
+            if content is None:
+                continue
+            score = (complete, sum(len(content.get(field) or ()) for field in required))
+            if best_score is None or score > best_score:
+                best, best_score = content, score
+
+        if best is not None:
+            return best
+
+        offset = text.find("{", offset) + 1
+        if offset == 0 or text.find("{", offset) == -1:
+            return None
+
+    return None
@@ -0,0 +1,84 @@
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+# Upstream calls take seconds, parsing and storage writes take (sub)milliseconds
+UPSTREAM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60)
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+REQUEST_LATENCY = Histogram(
+    "antisocial_request_seconds", "API request latency (until response headers)",
+    ["method", "endpoint", "status"]
+)
+GROQ_LATENCY = Histogram(
+    "antisocial_groq_seconds", "Upstream Groq call latency",
+    ["platform", "call_type", "model"], buckets=UPSTREAM_BUCKETS
+)
+GROQ_RESPONSES = Counter(
+    "antisocial_groq_responses_total", "Upstream Groq responses by HTTP status ('error' for transport failures)",
+    ["status"]
+)
+GROQ_TOKENS = Counter(
+    "antisocial_groq_tokens_total", "Tokens reported in Groq usage",
+    ["kind", "platform", "call_type", "model"]
+)
+GROQ_RETRIES = Counter(
+    "antisocial_groq_retries_total", "Groq calls retried after a transient error",
+    ["call_type", "reason"]
+)
+GROQ_HEDGES = Counter(
+    "antisocial_groq_hedges_total", "Hedged Groq requests (sent, won = hedge answered first, skipped = no spare capacity)",
+    ["call_type", "outcome"]
+)
+RATE_LIMIT_WAIT = Histogram(
+    "antisocial_rate_limit_wait_seconds", "Time queued for client-side rate-limit capacity",
+    ["lane"], buckets=(0.001, 0.01, 0.1, 0.5, 1, 2, 5, 10, 20, 30, 60)
+)
+RATE_LIMIT_REJECTED = Counter(
+    "antisocial_rate_limit_rejected_total", "Calls that found no rate-limit capacity within the queueing deadline",
+    ["lane"]
+)
+GENERATE_COALESCED = Counter(
+    "antisocial_generate_coalesced_total", "Generate requests served by an identical in-flight upstream call",
+    ["platform"]
+)
+CASCADE_ESCALATIONS = Counter(
+    "antisocial_cascade_escalations_total", "Generations escalated to a larger model after invalid output",
+    ["platform", "model"]
+)
+NEAR_DUPLICATES = Counter(
+    "antisocial_near_duplicates_total",
+    "Near-duplicate lookups on a cache miss (hit, miss, stale = content no longer cached)",
+    ["platform", "outcome"]
+)
+PARSE_LATENCY = Histogram(
+    "antisocial_parse_seconds", "Time to parse a model response",
+    ["call_type"], buckets=FAST_BUCKETS
+)
+PARSE_FAILURES = Counter(
+    "antisocial_parse_failures_total", "Model responses without usable content",
+    ["call_type"]
+)
+FALLBACK_CONTENT = Counter(
+    "antisocial_fallback_content_total", "Sessions created from fallback content",
+    ["platform", "reason"]
+)
+PROVISIONAL_RESOLVED = Counter(
+    "antisocial_provisional_resolved_total",
+    "Provisional sessions after the late upstream result (replaced, kept = edited meanwhile, failed)",
+    ["outcome"]
+)
+STORAGE_WRITE_LATENCY = Histogram(
+    "antisocial_storage_write_seconds", "Session persistence time (one write or one write-behind batch)",
+    ["mode"], buckets=FAST_BUCKETS
+)
+
+def observe_groq(platform, call_type, model, seconds, status, usage=None):
+    """Record one upstream call: latency, status and token usage"""
+    GROQ_LATENCY.labels(platform, call_type, model).observe(seconds)
+    GROQ_RESPONSES.labels(str(status)).inc()
+    if usage:
+        GROQ_TOKENS.labels("prompt", platform, call_type, model).inc(usage.get("prompt_tokens") or 0)
+        GROQ_TOKENS.labels("completion", platform, call_type, model).inc(usage.get("completion_tokens") or 0)
+
+def render():
+    """Prometheus text exposition for /metrics"""
+    return generate_latest(), CONTENT_TYPE_LATEST
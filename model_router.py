@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import deque
+
+class ModelStats:
+    """Rolling latency/error window plus lifetime totals for one model"""
+    def __init__(self, window):
+        self.recent = deque(maxlen=window)  # (seconds, ok)
+        self.calls = 0
+        self.errors = 0
+        self.fallbacks = 0
+        self.escalations = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.last_error_at = 0.0
+
+    def error_rate(self):
+        if not self.recent:
+            return 0.0
+        return sum(not ok for _, ok in self.recent) / len(self.recent)
+
+    def p50(self):
+        latencies = sorted(seconds for seconds, ok in self.recent if ok)
+        return latencies[len(latencies) // 2] if latencies else None
+
+    def p95(self):
+        latencies = sorted(seconds for seconds, ok in self.recent if ok)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None
+
+class ModelRouter:
+    """Orders the configured models of a route by health and rolling p50 latency
+
+    Routes are looked up as "platform:call_type", then "platform", then
+    "call_type", then the default list. A model whose recent error rate is
+    above error_threshold is skipped for `cooldown` seconds after its last
+    error, then probed again. Models with fewer than min_samples calls are
+    tried first so every model gets measured.
+    """
+    def __init__(self, default_models, routes=None, window=100, min_samples=5,
+                 error_threshold=0.5, cooldown=30, prices=None):
+        self.default_models = list(default_models)
+        self.routes = {key: list(models) for key, models in (routes or {}).items()}
+        self.window = window
+        self.min_samples = min_samples
+        self.error_threshold = error_threshold
+        self.cooldown = cooldown
+        self.prices = prices or {}
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def _stats(self, model):
+        stats = self.stats.get(model)
+        if stats is None:
+            stats = self.stats[model] = ModelStats(self.window)
+        return stats
+
+    def route(self, platform, call_type):
+        """Configured models for a call, before ordering"""
+        for key in (f"{platform}:{call_type}", platform, call_type):
+            if key in self.routes:
+                return self.routes[key]
+        return self.default_models
+
+    def healthy(self, model, now=None):
+        with self.lock:
+            return self._healthy(self._stats(model), now or time.monotonic())
+
+    def _healthy(self, stats, now):
+        if len(stats.recent) < self.min_samples or stats.error_rate() <= self.error_threshold:
+            return True
+        return now - stats.last_error_at > self.cooldown
+
+    def candidates(self, platform, call_type):
+        """Models to try in order: healthy before unhealthy, then fastest first"""
+        models = self.route(platform, call_type)
+        if len(models) < 2:
+            return list(models)
+
+        now = time.monotonic()
+        with self.lock:
+            def key(item):
+                position, model = item
+                stats = self._stats(model)
+                p50 = stats.p50() if len(stats.recent) >= self.min_samples else None
+                # Unmeasured models sort before measured ones, in configured order
+                return (not self._healthy(stats, now), p50 is not None, p50 or 0.0, position)
+            return [model for _, model in sorted(enumerate(models), key=key)]
+
+    def record(self, model, seconds, ok, usage=None):
+        with self.lock:
+            stats = self._stats(model)
+            stats.recent.append((seconds, ok))
+            stats.calls += 1
+            if not ok:
+                stats.errors += 1
+                stats.last_error_at = time.monotonic()
+            if usage:
+                stats.prompt_tokens += usage.get("prompt_tokens") or 0
+                stats.completion_tokens += usage.get("completion_tokens") or 0
+
+    def record_fallback(self, model):
+        """model failed and the call moved on to the next one"""
+        with self.lock:
+            self._stats(model).fallbacks += 1
+
+    def record_escalation(self, model):
+        """model's output failed validation and the cascade moved to a larger model"""
+        with self.lock:
+            self._stats(model).escalations += 1
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self.lock:
+            models = {}
+            for model, stats in self.stats.items():
+                row = {
+                    "healthy": self._healthy(stats, now),
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "recent_error_rate": stats.error_rate(),
+                    "p50_ms": stats.p50() * 1000 if stats.p50() is not None else None,
+                    "p95_ms": stats.p95() * 1000 if stats.p95() is not None else None,
+                    "fallbacks": stats.fallbacks,
+                    "escalations": stats.escalations,
+                    "prompt_tokens": stats.prompt_tokens,
+                    "completion_tokens": stats.completion_tokens
+                }
+                price = self.prices.get(model)
+                if price:
+                    # Prices are USD per million input / output tokens
+                    row["cost_usd"] = (stats.prompt_tokens * price[0] + stats.completion_tokens * price[1]) / 1e6
+                models[model] = row
+            return {"default": self.default_models, "routes": self.routes, "models": models}
@@ -0,0 +1,205 @@
+import json
+import math
+import re
+import sys
+import threading
+import zlib
+from pathlib import Path
+from config import (
+    NEAR_DUP_MODE, NEAR_DUP_PATH, NEAR_DUP_THRESHOLD, NEAR_DUP_MAX_ENTRIES, NEAR_DUP_POSTINGS,
+    GROQ_MODEL, PROMPT_VERSION
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9#+]+")
+STOPWORDS = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "into", "is", "it",
+    "of", "on", "or", "the", "to", "vs", "what", "why", "with", "your", "you", "about"
+))
+
+def tokenize(text):
+    """Sorted unique content words, lowercased and crudely singularized"""
+    tokens = set()
+    for token in _TOKEN_RE.findall(str(text).lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.add(zlib.crc32(token.encode("utf-8")))
+    return tuple(sorted(tokens))
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    shared = len(set(a).intersection(b))
+    return shared / (len(a) + len(b) - shared)
+
+class NearDuplicateIndex:
+    """Finds an earlier generation for a similar platform/topic/audience/tone
+
+    Topics and audiences become sets of hashed content words. Entries are
+    partitioned by platform and tone (which must match exactly) and found
+    through an inverted index from topic word to the most recent
+    `postings` entries using it. Only the rarest query words are looked
+    up (prefix filtering), so a lookup touches a few short postings lists
+    and never more than words x postings entries, however large the index
+    is. Candidates are scored by Jaccard similarity, topic counting twice
+    as much as audience.
+    Entries point at response cache keys and are appended to a JSONL file
+    so the index survives restarts.
+    """
+    def __init__(self, path, threshold=0.7, max_entries=1000000, postings=128, enabled=True):
+        self.path = Path(path)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.postings_limit = postings
+        self.enabled = enabled
+        self.version = f"{GROQ_MODEL}:{PROMPT_VERSION}"
+        self.lock = threading.Lock()
+        self.entries = {}   # entry id -> (cache key, topic tokens, audience tokens)
+        self.postings = {}  # (platform, tone, topic token) -> [entry id, ...], oldest first
+        self.shared = {}    # one object per distinct token / audience, so entries don't repeat them
+        self.next_id = 0
+        self.oldest_id = 0
+        self.lines = 0
+        self.hits = 0
+        self.misses = 0
+
+        if self.enabled:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path, 'r') as f:
+            for line in f:
+                self.lines += 1
+                try:
+                    key, platform, tone, topic, audience, version = json.loads(line)
+                except (ValueError, TypeError):
+                    continue
+                # Entries made with another model or prompt version point at content we'd no longer generate
+                if version == self.version:
+                    self._insert(key, platform, tone, topic, audience)
+        if self.lines > 2 * len(self.entries) + 1000:
+            self._rewrite()
+
+    def _group(self, platform, tone):
+        return sys.intern(platform), sys.intern(" ".join(str(tone).lower().split()))
+
+    def _insert(self, key, platform, tone, topic, audience):
+        entry_id = self.next_id
+        self.next_id += 1
+        shared = self.shared
+        topic_tokens = tuple(shared.setdefault(token, token) for token in tokenize(topic))
+        audience_tokens = tokenize(audience)
+        audience_tokens = shared.setdefault(audience_tokens, audience_tokens)
+        self.entries[entry_id] = (key, topic_tokens, audience_tokens)
+
+        group = self._group(platform, tone)
+        for token in topic_tokens:
+            ids = self.postings.setdefault(group + (token,), [])
+            ids.append(entry_id)
+            # Trim in chunks so appends stay O(1) amortized
+            if len(ids) >= 2 * self.postings_limit:
+                del ids[:self.postings_limit]
+
+        while len(self.entries) > self.max_entries:
+            self.entries.pop(self.oldest_id, None)
+            self.oldest_id += 1
+
+    def add(self, key, platform, topic, audience, tone):
+        """Remember a valid generation stored under response cache key"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self._insert(key, platform, tone, topic, audience)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps([key, platform, tone, topic, audience, self.version]) + "\n")
+            self.lines += 1
+            if self.lines > 2 * len(self.entries) + 1000:
+                self._rewrite()
+
+    def _rewrite(self):
+        """Compact the file to the newest line of each live entry (entries only keep hashed words)"""
+        live = {key for key, _, _ in self.entries.values()}
+        lines = {}
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    key = json.loads(line)[0]
+                except (ValueError, IndexError):
+                    continue
+                if key in live:
+                    lines[key] = line
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            f.write("".join(lines.values()))
+        tmp_path.replace(self.path)
+        self.lines = len(lines)
+
+    def lookup(self, platform, topic, audience, tone):
+        """(cache key, similarity) of the most similar entry at or above the threshold, or None"""
+        if not self.enabled:
+            return None
+        topic_tokens = tokenize(topic)
+        audience_tokens = tokenize(audience)
+        group = self._group(platform, tone)
+        # Below this topic similarity even a perfect audience match can't reach the threshold
+        min_topic = (3 * self.threshold - 1) / 2
+        # ... and an entry sharing fewer words than this can't reach min_topic
+        min_shared = max(1, math.ceil(min_topic * len(topic_tokens) - 1e-9))
+        query = set(topic_tokens)
+        with self.lock:
+            # Prefix filter: an entry sharing min_shared words appears in the postings of at
+            # least one of the len - min_shared + 1 rarest query words, so common words are skipped
+            postings = self.postings
+            lists = sorted((postings.get(group + (token,), ()) for token in topic_tokens), key=len)
+            entries = self.entries
+            size = len(topic_tokens)
+            seen = set()
+            best = None
+            for ids in lists[:size - min_shared + 1]:
+                for entry_id in ids[-self.postings_limit:]:
+                    if entry_id in seen:
+                        continue
+                    seen.add(entry_id)
+                    entry = entries.get(entry_id)
+                    if entry is None:
+                        continue
+                    count = len(query.intersection(entry[1]))
+                    if count < min_shared:
+                        continue
+                    topic_score = count / (size + len(entry[1]) - count)
+                    if topic_score < min_topic:
+                        continue
+                    score = (2 * topic_score + jaccard(audience_tokens, entry[2])) / 3
+                    # Newest entry wins a tie
+                    if score >= self.threshold and (best is None or (score, entry_id) > best[:2]):
+                        best = (score, entry_id, entry[0])
+
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return best[2], best[0]
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self.entries),
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+near_duplicates = NearDuplicateIndex(
+    NEAR_DUP_PATH,
+    threshold=NEAR_DUP_THRESHOLD,
+    max_entries=NEAR_DUP_MAX_ENTRIES,
+    postings=NEAR_DUP_POSTINGS,
+    enabled=NEAR_DUP_MODE != "off"
+)
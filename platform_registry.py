@@ -0,0 +1,100 @@
+import json
+import re
+from pathlib import Path
+from config import PLATFORMS_DIR
+from content_patch import PATCH_INSTRUCTIONS
+
+REQUIRED_FIELDS = (
+    "id", "name", "description", "hashtag_count", "focus", "system_prompt", "schema",
+    "instructions", "user_prompt", "chat_system_prompt", "fallback"
+)
+INFO_FIELDS = ("name", "description", "hashtag_count", "focus")
+SEED_PROMPT = ("\n\nContent generated earlier for a similar request, to use as a starting point "
+               "(adapt it to this topic, audience and tone):\n")
+
+def compile_template(template, names):
+    """Render function for template, built once: {name} placeholders in its strings are filled in"""
+    placeholder = re.compile(r"\{(" + "|".join(map(re.escape, names)) + r")\}")
+
+    def build(value):
+        if isinstance(value, dict):
+            items = [(key, build(item)) for key, item in value.items()]
+            return lambda args: {key: render(args) for key, render in items}
+        if isinstance(value, list):
+            renders = [build(item) for item in value]
+            return lambda args: [render(args) for render in renders]
+        if isinstance(value, str):
+            # split() puts literal text at even positions and placeholder names at odd ones
+            parts = placeholder.split(value)
+            if len(parts) == 1:
+                return lambda args: value
+            slots = [(i, names.index(part)) for i, part in enumerate(parts) if i % 2]
+
+            def render(args):
+                text = parts.copy()
+                for i, arg in slots:
+                    text[i] = args[arg]
+                return "".join(text)
+            return render
+        # Numbers, booleans and null are copied as they are
+        return lambda args: value
+
+    render = build(template)
+    return lambda *args: render(args)
+
+class PlatformSpec:
+    """One platform's metadata, prompts and fallback content, compiled at load time
+
+    The system message holds everything that does not depend on the request
+    (role, JSON schema, instructions), so every generation for a platform
+    starts with the same bytes and upstream prompt caching can reuse them.
+    """
+    def __init__(self, definition):
+        self.id = definition["id"]
+        self.order = definition.get("order", 0)
+        self.info = {field: definition[field] for field in INFO_FIELDS}
+        self.name = self.info["name"]
+
+        schema = definition["schema"]
+        if isinstance(schema, list):
+            schema = "\n".join(schema)
+        self.system_message = {
+            "role": "system",
+            "content": (f"{definition['system_prompt']}\n\n"
+                        f"Return EXACTLY this JSON structure:\n{schema}\n\n"
+                        f"{definition['instructions']}")
+        }
+        self.chat_system_message = {"role": "system", "content": definition["chat_system_prompt"]}
+        self.patch_system_message = {
+            "role": "system",
+            "content": f"{definition['chat_system_prompt']}\n\n{PATCH_INSTRUCTIONS}"
+        }
+        self._user_prompt = compile_template(definition["user_prompt"], ("topic", "audience", "tone"))
+        self._fallback = compile_template(definition["fallback"], ("topic", "topic_tag"))
+
+    def build_messages(self, topic, audience, tone, seed=None):
+        """Generation messages: the shared system prefix, then the request (and optional seed content)"""
+        prompt = self._user_prompt(topic, audience, tone)
+        if seed:
+            prompt += SEED_PROMPT + json.dumps(seed, ensure_ascii=False, separators=(",", ":"))
+        return [self.system_message, {"role": "user", "content": prompt}]
+
+    def render_fallback(self, topic):
+        """Fallback content for topic (a fresh object every call)"""
+        return self._fallback(topic, topic.replace(" ", ""))
+
+def load_platforms(directory):
+    """PlatformSpecs from every *.json definition in directory, in definition order"""
+    specs = []
+    for path in sorted(Path(directory).glob("*.json")):
+        definition = json.loads(path.read_text(encoding="utf-8"))
+        missing = [field for field in REQUIRED_FIELDS if field not in definition]
+        if missing:
+            raise Exception(f"Invalid platform definition {path}: missing {', '.join(missing)}")
+        specs.append(PlatformSpec(definition))
+    if not specs:
+        raise Exception(f"No platform definitions found in {directory}")
+    return {spec.id: spec for spec in sorted(specs, key=lambda spec: (spec.order, spec.id))}
+
+# Loaded once at import; restart to pick up edited definitions
+platforms = load_platforms(PLATFORMS_DIR)
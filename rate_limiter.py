@@ -0,0 +1,274 @@
+import asyncio
+import heapq
+import itertools
+import re
+import threading
+import time
+
+# Lower runs first: interactive chat turns ahead of single generations ahead of bulk jobs
+LANE_PRIORITY = {"chat": 0, "generate": 1, "bulk": 2}
+
+# Waiters re-check at least this often: settle() can hand back capacity early
+POLL_INTERVAL = 0.25
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+
+class RateLimitError(Exception):
+    """No upstream capacity within the queueing deadline (or Groq answered 429)"""
+    def __init__(self, message, retry_after=None, status_code=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+def parse_duration(value):
+    """Seconds from a Retry-After / x-ratelimit-reset value ("7.66s", "2m59.5s", "120ms", "3")"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+def estimate_tokens(messages, max_tokens):
+    """Upper-bound token cost of a call: ~4 characters per prompt token plus the completion limit"""
+    prompt_chars = sum(len(str(message.get("content", ""))) for message in messages)
+    return prompt_chars // 4 + max_tokens
+
+class TokenBucket:
+    """Refills continuously at limit/minute; holds at most burst_seconds worth.
+
+    The bucket grows to hold the largest cost asked of it, so a call bigger
+    than burst_seconds of quota waits for a full bucket instead of leaving
+    it in debt and delaying every call after it.
+    """
+    def __init__(self, per_minute, burst_seconds):
+        self.rate = per_minute / 60
+        self.capacity = self.rate * burst_seconds
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    @property
+    def enabled(self):
+        return self.rate > 0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, cost, now):
+        """Seconds until cost can be taken (0 if now)"""
+        if not self.enabled:
+            return 0.0
+        self.capacity = max(self.capacity, cost)
+        self._refill(now)
+        return max(0.0, (cost - self.tokens) / self.rate)
+
+    def take(self, cost):
+        if self.enabled:
+            self.tokens -= cost
+
+    def give_back(self, amount):
+        if self.enabled:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def clamp(self, remaining):
+        """The server says only `remaining` is left"""
+        if self.enabled:
+            self.tokens = min(self.tokens, remaining)
+
+    def drain(self):
+        if self.enabled:
+            self.tokens = min(self.tokens, 0.0)
+
+class RateLimiter:
+    """Client-side RPM/TPM scheduler with priority lanes and bounded queueing
+
+    Callers wait in one priority queue; only the head may take capacity, so a
+    chat turn that arrives behind queued generations still goes first.
+    Response headers (x-ratelimit-*, retry-after) correct the local buckets.
+    """
+    def __init__(self, rpm, tpm, burst_seconds=60, queue_timeout=30, max_queue=200):
+        self.requests = TokenBucket(rpm, burst_seconds)
+        self.tokens = TokenBucket(tpm, burst_seconds)
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.cond = threading.Condition()
+        self.waiting = []
+        self.counter = itertools.count()
+        self.paused_until = 0.0
+        self.acquired = 0
+        self.rejected = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.throttled_by_server = 0
+
+    @property
+    def enabled(self):
+        return self.requests.enabled or self.tokens.enabled
+
+    def _enqueue(self, lane):
+        with self.cond:
+            if len(self.waiting) >= self.max_queue:
+                self.rejected += 1
+                raise RateLimitError("Groq request queue is full", retry_after=self._head_wait())
+            ticket = (LANE_PRIORITY.get(lane, LANE_PRIORITY["generate"]), next(self.counter))
+            heapq.heappush(self.waiting, ticket)
+            return ticket
+
+    def _head_wait(self):
+        return max(1.0, self.paused_until - time.monotonic())
+
+    def _poll(self, ticket, cost):
+        """Take capacity if ticket is first in line and it is available; else seconds to wait"""
+        with self.cond:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            if self.waiting[0] != ticket:
+                # Re-checked when the head leaves (sync waiters are notified)
+                return 0.05
+            wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(cost, now))
+            if wait > 0:
+                return wait
+            self.requests.take(1)
+            self.tokens.take(cost)
+            heapq.heappop(self.waiting)
+            self.cond.notify_all()
+            return 0.0
+
+    def _leave(self, ticket, waited, reject):
+        with self.cond:
+            if ticket in self.waiting:
+                self.waiting.remove(ticket)
+                heapq.heapify(self.waiting)
+                self.cond.notify_all()
+            if reject:
+                self.rejected += 1
+            else:
+                waited_ms = waited * 1000
+                self.acquired += 1
+                self.wait_ms_total += waited_ms
+                self.wait_ms_max = max(self.wait_ms_max, waited_ms)
+
+    def _give_up(self, ticket, started, wait):
+        self._leave(ticket, time.monotonic() - started, reject=True)
+        raise RateLimitError("Groq rate limit: no capacity within the queueing deadline", retry_after=wait)
+
+    def acquire(self, cost, lane="generate"):
+        """Block until one request and cost tokens are available; returns seconds waited"""
+        if not self.enabled and time.monotonic() >= self.paused_until:
+            return 0.0
+        ticket = self._enqueue(lane)
+        started = time.monotonic()
+        deadline = started + self.queue_timeout
+        while True:
+            wait = self._poll(ticket, cost)
+            if wait == 0:
+                break
+            remaining = deadline - time.monotonic()
+            if wait > remaining:
+                self._give_up(ticket, started, wait)
+            with self.cond:
+                self.cond.wait(min(wait, POLL_INTERVAL))
+        waited = time.monotonic() - started
+        self._leave(ticket, waited, reject=False)
+        return waited
+
+    async def aacquire(self, cost, lane="generate"):
+        """Async acquire: waits without blocking the event loop"""
+        if not self.enabled and time.monotonic() >= self.paused_until:
+            return 0.0
+        ticket = self._enqueue(lane)
+        started = time.monotonic()
+        deadline = started + self.queue_timeout
+        try:
+            while True:
+                wait = self._poll(ticket, cost)
+                if wait == 0:
+                    break
+                remaining = deadline - time.monotonic()
+                if wait > remaining:
+                    self._give_up(ticket, started, wait)
+                await asyncio.sleep(min(wait, POLL_INTERVAL))
+        except asyncio.CancelledError:
+            self._leave(ticket, time.monotonic() - started, reject=True)
+            raise
+        waited = time.monotonic() - started
+        self._leave(ticket, waited, reject=False)
+        return waited
+
+    def try_acquire(self, cost):
+        """Take capacity only if it is free right now and nobody is queued"""
+        if not self.enabled:
+            return time.monotonic() >= self.paused_until
+        with self.cond:
+            now = time.monotonic()
+            if self.waiting or now < self.paused_until:
+                return False
+            if self.requests.wait_time(1, now) > 0 or self.tokens.wait_time(cost, now) > 0:
+                return False
+            self.requests.take(1)
+            self.tokens.take(cost)
+            self.acquired += 1
+            return True
+
+    def settle(self, estimated, actual):
+        """Return the unused part of a token estimate once usage is known"""
+        if actual is None:
+            return
+        with self.cond:
+            self.tokens.give_back(max(0, estimated - actual))
+            self.cond.notify_all()
+
+    def observe_headers(self, status_code, headers):
+        """Feed Groq's rate-limit headers back into the buckets"""
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        with self.cond:
+            now = time.monotonic()
+            if remaining_tokens is not None:
+                try:
+                    self.tokens.clamp(float(remaining_tokens))
+                except ValueError:
+                    pass
+            # Groq's request header counts per day; at zero nothing goes through until reset
+            if remaining_requests == "0":
+                reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+                if reset:
+                    self.paused_until = max(self.paused_until, now + reset)
+            if status_code == 429:
+                self.throttled_by_server += 1
+                retry_after = (parse_duration(headers.get("retry-after"))
+                               or parse_duration(headers.get("x-ratelimit-reset-tokens"))
+                               or 1.0)
+                self.paused_until = max(self.paused_until, now + retry_after)
+                self.requests.drain()
+                self.tokens.drain()
+            self.cond.notify_all()
+
+    def retry_after(self):
+        """Seconds until the server said to come back (0 if not paused)"""
+        return max(0.0, self.paused_until - time.monotonic())
+
+    def snapshot(self):
+        with self.cond:
+            now = time.monotonic()
+            self.requests._refill(now)
+            self.tokens._refill(now)
+            return {
+                "enabled": self.enabled,
+                "queued": len(self.waiting),
+                "acquired": self.acquired,
+                "rejected": self.rejected,
+                "throttled_by_server": self.throttled_by_server,
+                "avg_wait_ms": self.wait_ms_total / self.acquired if self.acquired else 0.0,
+                "max_wait_ms": self.wait_ms_max,
+                "paused_for_s": max(0.0, self.paused_until - now),
+                "requests_available": self.requests.tokens if self.requests.enabled else None,
+                "tokens_available": self.tokens.tokens if self.tokens.enabled else None
+            }
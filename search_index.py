@@ -0,0 +1,470 @@
+import bisect
+import heapq
+import json
+import math
+import pickle
+import re
+import shutil
+import threading
+import zlib
+from array import array
+from pathlib import Path
+from near_duplicates import STOPWORDS
+
+RESULT_FIELDS = ("session_id", "platform", "topic", "audience", "tone", "created_at")
+# Summed per term, so a word in the topic and a hashtag outranks one only in an angle
+FIELD_WEIGHTS = {"topic": 4, "hashtags": 3, "hooks": 2, "angles": 1}
+MAX_WEIGHT = sum(FIELD_WEIGHTS.values())
+MAX_QUERY_TERMS = 10
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_QUERY_RE = re.compile(r"#?[a-z0-9]+\*?")
+
+def _texts(value):
+    return [str(item) for item in value if item] if isinstance(value, list) else []
+
+def document_terms(data):
+    """{term: weight} for a session's topic, hashtags, blueprint hooks and trending angles"""
+    content = data.get("content")
+    if not isinstance(content, dict):
+        content = {}
+    blueprints = content.get("post_blueprints")
+    hooks = [blueprint.get("hook") for blueprint in blueprints if isinstance(blueprint, dict)] \
+        if isinstance(blueprints, list) else []
+    fields = {
+        "topic": [str(data.get("topic") or "")],
+        "hashtags": _texts(content.get("hashtags")),
+        "hooks": _texts(hooks),
+        "angles": _texts(content.get("trending_angles"))
+    }
+
+    terms = {}
+    for field, texts in fields.items():
+        found = set()
+        for text in texts:
+            text = text.lower()
+            if field == "hashtags":
+                # "#AI in Education" -> "#aiineducation", also findable as a plain word
+                tag = "".join(_WORD_RE.findall(text))
+                if tag:
+                    found.update(("#" + tag, tag))
+            found.update(word for word in _WORD_RE.findall(text) if word not in STOPWORDS)
+        for term in found:
+            terms[term] = terms.get(term, 0) + FIELD_WEIGHTS[field]
+    return terms
+
+def parse_query(query):
+    """(term, is_prefix) pairs: words, #hashtags and prefix* terms, stopwords dropped"""
+    tokens = []
+    for token in _QUERY_RE.findall(str(query).lower()):
+        prefix = token.endswith("*")
+        term = token.rstrip("*")
+        if prefix or term.startswith("#") or term not in STOPWORDS:
+            if (term, prefix) not in tokens:
+                tokens.append((term, prefix))
+    return tokens[:MAX_QUERY_TERMS]
+
+class IndexWarmingError(Exception):
+    """The index is still being loaded or built at startup"""
+
+class SearchIndex:
+    """In-memory inverted index over sessions: a pickled snapshot plus a JSONL journal of later saves.
+
+    Each term maps to its ascending doc ids and a bytearray of the term's
+    weight in each doc. A saved session gets a fresh doc id and the old one
+    is tombstoned, so an update only appends. Once the journal grows, a
+    background thread writes a tombstone-free copy of the index as the new
+    snapshot and swaps it in; saves and queries only wait for a shallow
+    copy and the swap. One-word and prefix queries
+    walk the postings best weight first and stop after a page, so a word
+    found in most sessions costs about as much as a rare one. Results carry
+    the session summary: a query never reads a session body. At startup
+    start() loads (or first builds) the index in a background thread;
+    searches raise IndexWarmingError until it is ready.
+    """
+    def __init__(self, path, prefix_terms=200):
+        self.path = Path(path)
+        self.snapshot_path = self.path.with_suffix(".snapshot")
+        # The journal being folded into the next snapshot
+        self.folding_path = self.path.with_name(self.path.name + ".folding")
+        self.prefix_terms = prefix_terms
+        self.lock = threading.Lock()
+        self.docs = []          # doc id -> (*RESULT_FIELDS, signature), None once replaced
+        self.doc_ids = {}       # session id -> current doc id
+        self.postings = {}      # term -> (doc ids, weights)
+        self.vocabulary = []    # sorted terms, for prefix queries
+        self.replaced = set()   # tombstoned doc ids still in the postings
+        self.platforms = {}     # platform -> live doc ids
+        self.loading = False
+        self.ready = False      # loaded; until then only the journal and pending are touched
+        self.lines = 0          # journal lines since the snapshot
+        self.folding = None     # background thread writing the next snapshot
+        self.pending = []       # records saved while loading or folding, replayed afterwards
+
+    def start(self, rebuild):
+        """load() in a background thread, off the startup path"""
+        threading.Thread(target=self.load, args=(rebuild,), name="search-index-load", daemon=True).start()
+
+    def load(self, rebuild):
+        """Load the snapshot and replay the journals, or build the index from rebuild() on first start
+
+        rebuild() yields (session_id, data) pairs. Saves made meanwhile are
+        journaled as usual and indexed once the load is done.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Without a snapshot the first build never finished: the journal alone is not the whole index
+        fresh = not self.snapshot_path.exists()
+        self.loading = True
+        if fresh:
+            for session_id, data in rebuild():
+                line = json.dumps(self._record(session_id, data))
+                self._insert(json.loads(line), zlib.crc32(line.encode("utf-8")))
+            lines = 0
+        else:
+            lines = self._read((self.folding_path, self.path))
+        self.loading = False
+        self.vocabulary = sorted(self.postings)
+
+        with self.lock:
+            # Newer than anything read above
+            for record, signature in self.pending:
+                self._insert(record, signature)
+            self.pending = []
+            self.lines += lines
+            self.ready = True
+            # A leftover .folding journal means the last fold was cut short
+            if fresh or self.folding_path.exists():
+                self._start_fold()
+
+    def _read(self, journals):
+        """Load the snapshot, then replay the journals in order; returns the lines replayed"""
+        lines = 0
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, 'rb') as f:
+                self.docs, self.postings = pickle.load(f)
+            for doc_id, doc in enumerate(self.docs):
+                if doc is not None:
+                    self.doc_ids[doc[0]] = doc_id
+                    self.platforms.setdefault(doc[1], set()).add(doc_id)
+        for journal in journals:
+            if not journal.exists():
+                continue
+            with open(journal, 'r') as f:
+                for line in f:
+                    line = line.rstrip("\n")
+                    try:
+                        self._insert(json.loads(line), zlib.crc32(line.encode("utf-8")))
+                    except (ValueError, TypeError, AttributeError):
+                        continue
+                    lines += 1
+        return lines
+
+    @staticmethod
+    def _record(session_id, data):
+        return [
+            session_id,
+            data.get("platform", "unknown"),
+            data.get("topic", "Untitled"),
+            data.get("audience", ""),
+            data.get("tone", ""),
+            data.get("created_at") or "",
+            document_terms(data)
+        ]
+
+    def _insert(self, record, signature):
+        """Index record unless it is identical to the session's current version; True if indexed"""
+        *fields, terms = record
+        terms = list(terms.items())
+        session_id, platform = fields[0], fields[1]
+        old_id = self.doc_ids.get(session_id)
+        if old_id is not None:
+            if self.docs[old_id][-1] == signature:
+                return False
+            self.platforms[self.docs[old_id][1]].discard(old_id)
+            self.docs[old_id] = None
+            self.replaced.add(old_id)
+
+        doc_id = len(self.docs)
+        self.docs.append((*fields, signature))
+        self.doc_ids[session_id] = doc_id
+        self.platforms.setdefault(platform, set()).add(doc_id)
+        for term, weight in terms:
+            entry = self.postings.get(term)
+            if entry is None:
+                entry = self.postings[term] = (array("I"), bytearray())
+                if not self.loading:
+                    bisect.insort(self.vocabulary, term)
+            entry[0].append(doc_id)
+            entry[1].append(min(weight, MAX_WEIGHT))
+        return True
+
+    def add(self, session_id, data):
+        """Index a saved session, replacing its previous version"""
+        line = json.dumps(self._record(session_id, data))
+        # Index the record as a journal replay will see it
+        record, signature = json.loads(line), zlib.crc32(line.encode("utf-8"))
+        with self.lock:
+            # The loader owns the index until it is ready
+            if self.ready and not self._insert(record, signature):
+                return
+            with open(self.path, 'a') as f:
+                f.write(line + "\n")
+            self.lines += 1
+            if self.folding or not self.ready:
+                self.pending.append((record, signature))
+            # Bounds both the replay at startup and the tombstones kept in memory
+            elif self.lines > len(self.doc_ids) // 4 + 1000:
+                self._start_fold()
+
+    def _start_fold(self):
+        """Move the journal aside and snapshot the index as of now in the background (lock held)"""
+        # Later saves go to a fresh journal, the snapshot covers this one
+        if not self.folding_path.exists():
+            if self.path.exists():
+                self.path.replace(self.folding_path)
+        elif self.path.exists():
+            # Left by a fold that was cut short or failed: the snapshot covers its lines too
+            with open(self.path, 'r') as journal, open(self.folding_path, 'a') as folding:
+                shutil.copyfileobj(journal, folding)
+            self.path.unlink()
+        self.lines = 0
+        self.folding = threading.Thread(
+            target=self._fold, args=(list(self.docs), dict(self.postings), set(self.replaced)), daemon=True
+        )
+        self.folding.start()
+
+    def _fold(self, docs, postings, replaced):
+        """Save a compacted copy of the index as of the journal rotation, then swap it in
+
+        postings is a shallow copy: saves keep appending to its arrays, so
+        each is cut back to the doc ids that existed at the rotation.
+        """
+        try:
+            index = SearchIndex(self.path, self.prefix_terms)
+            index.docs, index.replaced = docs, replaced
+            for term, (ids, weights) in postings.items():
+                end = bisect.bisect_left(ids, len(docs))
+                index.postings[term] = (ids[:end], weights[:end])
+            for doc_id, doc in enumerate(docs):
+                if doc is not None:
+                    index.doc_ids[doc[0]] = doc_id
+                    index.platforms.setdefault(doc[1], set()).add(doc_id)
+            index._write_snapshot()
+            index.vocabulary = sorted(index.postings)
+            self.folding_path.unlink(missing_ok=True)
+        except Exception as e:
+            # The .folding journal stays: close() (or the next start) snapshots everything
+            print(f"Search index snapshot failed: {e}")
+            index = None
+
+        with self.lock:
+            if index is not None:
+                for record, signature in self.pending:
+                    index._insert(record, signature)
+                # Swapped rather than assigned, so the old copy is freed after the lock is released
+                for name in ("docs", "doc_ids", "postings", "vocabulary", "replaced", "platforms"):
+                    current = getattr(self, name)
+                    setattr(self, name, getattr(index, name))
+                    setattr(index, name, current)
+            self.pending = []
+            self.folding = None
+
+    def _snapshot(self):
+        """Write a new snapshot of the whole index and empty the journals"""
+        self._write_snapshot()
+        # Crashing before this only means replaying lines the snapshot already has, which is harmless
+        open(self.path, 'w').close()
+        self.folding_path.unlink(missing_ok=True)
+        self.lines = 0
+
+    def _write_snapshot(self):
+        """Drop tombstones from the postings and pickle the index to the snapshot file"""
+        replaced = self.replaced
+        if replaced:
+            for term in list(self.postings):
+                ids, weights = self.postings[term]
+                if replaced.isdisjoint(ids):
+                    continue
+                keep = [i for i, doc_id in enumerate(ids) if doc_id not in replaced]
+                if keep:
+                    self.postings[term] = (array("I", [ids[i] for i in keep]), bytearray(weights[i] for i in keep))
+                else:
+                    del self.postings[term]
+            self.vocabulary = sorted(self.postings)
+            replaced.clear()
+
+        tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((self.docs, self.postings), f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(self.snapshot_path)
+
+    def close(self):
+        """Fold the journal into the snapshot so the next start has nothing to replay"""
+        while True:
+            with self.lock:
+                if not self.ready:
+                    # Still loading: the journal has every save, the next start loads again
+                    return
+                folding = self.folding
+                if folding is None:
+                    if self.lines or self.folding_path.exists():
+                        self._snapshot()
+                    return
+            folding.join()
+
+    def _expand(self, prefix):
+        """Terms starting with prefix, at most prefix_terms of them (the most frequent)"""
+        vocabulary = self.vocabulary
+        i = bisect.bisect_left(vocabulary, prefix)
+        terms = []
+        while i < len(vocabulary) and vocabulary[i].startswith(prefix):
+            terms.append(vocabulary[i])
+            i += 1
+        if len(terms) > self.prefix_terms:
+            terms = heapq.nlargest(self.prefix_terms, terms, key=lambda term: len(self.postings[term][0]))
+        return terms
+
+    @staticmethod
+    def _bucket(ids, weights, weight, idf):
+        """(score, doc id) of the postings with weight, newest first"""
+        score = weight * idf
+        needle = bytes((weight,))
+        end = len(weights)
+        while True:
+            i = weights.rfind(needle, 0, end)
+            if i < 0:
+                return
+            yield score, ids[i]
+            end = i
+
+    def _best(self, lists, count, allowed):
+        """Total and best `count` (score, doc id) of the docs having any of lists' terms
+
+        Each term's postings are read one weight at a time, newest first,
+        and merged best first, so only about `count` of them are touched.
+        """
+        streams = [
+            self._bucket(ids, weights, weight, idf)
+            for (ids, weights), idf in lists for weight in range(MAX_WEIGHT, 0, -1)
+        ]
+        top = []
+        seen = set()
+        for score, doc_id in heapq.merge(*streams, reverse=True):
+            # A doc under several prefix terms comes first with its best score
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            if doc_id in allowed if allowed is not None else doc_id not in self.replaced:
+                top.append((score, doc_id))
+                if len(top) == count:
+                    break
+
+        if len(lists) == 1:
+            ids = lists[0][0][0]
+            if allowed is not None:
+                return len(allowed.intersection(ids)), top
+            return len(ids) - (len(self.replaced.intersection(ids)) if self.replaced else 0), top
+        matches = set()
+        for (ids, _), _ in lists:
+            matches.update(ids)
+        return len(matches & allowed if allowed is not None else matches - self.replaced), top
+
+    @staticmethod
+    def _weights(ids, weights, candidates):
+        """doc id -> weight for the candidates found in one term's postings"""
+        hits = candidates
+        if len(candidates) * 16 >= len(ids):
+            hits = candidates.intersection(ids)
+        if len(hits) * 16 >= len(ids):
+            found = dict(zip(ids, weights))
+            return {doc_id: found[doc_id] for doc_id in hits}
+        # Few left: binary search the ascending ids instead of scanning them
+        found = {}
+        for doc_id in hits:
+            i = bisect.bisect_left(ids, doc_id)
+            if i < len(ids) and ids[i] == doc_id:
+                found[doc_id] = weights[i]
+        return found
+
+    def _match(self, lists, candidates):
+        """doc id -> best score among lists' terms, for the candidates having any of them"""
+        scores = {}
+        for (ids, weights), idf in lists:
+            for doc_id, weight in self._weights(ids, weights, candidates).items():
+                if weight * idf > scores.get(doc_id, 0):
+                    scores[doc_id] = weight * idf
+        return scores
+
+    def _all(self, groups, count, allowed):
+        """Total and best `count` (score, doc id) of the docs matching every group"""
+        # Rarest group first: the candidate set only shrinks from there
+        groups.sort(key=lambda lists: sum(len(entry[0]) for entry, _ in lists))
+        matches = set()
+        for (ids, _), _ in groups[0]:
+            matches.update(ids)
+        if allowed is not None:
+            matches &= allowed
+        else:
+            matches -= self.replaced
+
+        scores = None
+        for lists in groups[1:]:
+            found = self._match(lists, matches)
+            if not found:
+                return 0, []
+            matches = set(found)
+            scores = found if scores is None else {doc_id: scores[doc_id] + score for doc_id, score in found.items()}
+        # The first group only filtered so far: score it for what is left
+        for doc_id, score in self._match(groups[0], matches).items():
+            scores[doc_id] += score
+        return len(matches), heapq.nlargest(count, zip(map(scores.__getitem__, matches), matches))
+
+    def search(self, query, limit=20, offset=0, platform=None):
+        """Ranked page of sessions matching every query term (tf-idf style, newest first on ties)"""
+        tokens = parse_query(query)
+        page = {"query": query, "total": 0, "results": [], "next_offset": None}
+        if not tokens:
+            return page
+
+        with self.lock:
+            if not self.ready:
+                raise IndexWarmingError("Search index is warming up, try again shortly")
+            live = max(len(self.doc_ids), 1)
+            groups = []
+            for term, prefix in tokens:
+                lists = [
+                    (self.postings[term], math.log(1 + live / len(self.postings[term][0])))
+                    for term in (self._expand(term) if prefix else [term]) if term in self.postings
+                ]
+                if not lists:
+                    return page
+                groups.append(lists)
+
+            allowed = self.platforms.get(platform, set()) if platform else None
+            if len(groups) == 1:
+                total, top = self._best(groups[0], offset + limit, allowed)
+            else:
+                total, top = self._all(groups, offset + limit, allowed)
+
+            page["total"] = total
+            page["results"] = [
+                {**dict(zip(RESULT_FIELDS, self.docs[doc_id])), "score": round(score, 3)}
+                for score, doc_id in top[offset:]
+            ]
+            if offset + limit < total:
+                page["next_offset"] = offset + limit
+            return page
+
+    def stats(self):
+        with self.lock:
+            if not self.ready:
+                return {"ready": False, "journal_lines": self.lines, "pending": len(self.pending)}
+            return {
+                "ready": True,
+                "sessions": len(self.doc_ids),
+                "terms": len(self.postings),
+                "postings": sum(len(ids) for ids, _ in self.postings.values()),
+                "journal_lines": self.lines,
+                "tombstones": len(self.replaced),
+                "snapshotting": self.folding is not None
+            }
@@ -1,68 +1,843 @@
+import atexit
+import base64
+import bisect
 import json
 import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
+from config import (
+    STORAGE_BACKEND, STORAGE_PATH, STORAGE_WRITE_BEHIND, STORAGE_FLUSH_INTERVAL,
+    STORAGE_FLUSH_BATCH, STORAGE_FSYNC, SESSION_CACHE_MAX_ENTRIES, SESSION_CACHE_MAX_BYTES,
+    CONVERSATION_COMPACT_BYTES, CONVERSATION_KEEP_MESSAGES, SEARCH_ENABLED, SEARCH_INDEX_PATH,
+    SEARCH_PREFIX_TERMS
+)
+from metrics import STORAGE_WRITE_LATENCY
+from search_index import SearchIndex
+
+SUMMARY_FIELDS = ("session_id", "platform", "topic", "audience", "tone", "created_at", "updated_at")
+
+def encode_cursor(created_at, session_id):
+    """Opaque pagination cursor pointing just after (created_at, session_id)"""
+    raw = json.dumps([created_at, session_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor):
+    try:
+        created_at, session_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    return created_at, session_id
+
+def make_summary(session_id, data):
+    """Compact listing entry for a session (no content)"""
+    return (
+        session_id,
+        data.get("platform", "unknown"),
+        data.get("topic", "Untitled"),
+        data.get("audience", ""),
+        data.get("tone", ""),
+        data.get("created_at") or "",
+        data.get("updated_at") or ""
+    )
+
+def atomic_write(path, text, fsync=False):
+    """Write to a temp file and rename it over path, so readers never see a partial file"""
+    path = Path(path)
+    # A temp file of its own, so concurrent writes of the same path don't share one
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def _matches(summary, platform, topic_prefix):
+    if platform and summary[1] != platform:
+        return False
+    if topic_prefix and not summary[2].lower().startswith(topic_prefix.lower()):
+        return False
+    return True
+
+class SessionIndex:
+    """Sorted in-memory summary index persisted as an append-only JSONL file.
+
+    Keeps (created_at, session_id) keys in a sorted list so a page is found
+    with a bisect and read without touching any session file. The latest
+    line per session wins on load; the file is rewritten when stale lines
+    outnumber live ones.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.summaries = {}
+        self.keys = []
+        self.lines = 0
+        self.latest = ""
+
+    def load(self, rebuild):
+        """Load the index file, or build it with rebuild() if it doesn't exist"""
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                for line in f:
+                    try:
+                        summary = tuple(json.loads(line))
+                    except ValueError:
+                        continue
+                    self.summaries[summary[0]] = summary
+                    self.lines += 1
+            self.keys = sorted((s[5], s[0]) for s in self.summaries.values())
+        else:
+            for session_id, data in rebuild().items():
+                self.summaries[session_id] = make_summary(session_id, data)
+            self.keys = sorted((s[5], s[0]) for s in self.summaries.values())
+            self._rewrite()
+        self.latest = max((s[6] for s in self.summaries.values()), default="")
+
+    def update(self, summary):
+        self.update_many([summary])
+
+    def update_many(self, summaries):
+        with self.lock:
+            for summary in summaries:
+                old = self.summaries.get(summary[0])
+                if old is None or old[5] != summary[5]:
+                    if old is not None:
+                        self.keys.pop(bisect.bisect_left(self.keys, (old[5], old[0])))
+                    bisect.insort(self.keys, (summary[5], summary[0]))
+                self.summaries[summary[0]] = summary
+                self.latest = max(self.latest, summary[6])
+
+            with open(self.path, 'a') as f:
+                f.write("".join(json.dumps(summary) + "\n" for summary in summaries))
+            self.lines += len(summaries)
+            if self.lines > 2 * len(self.summaries) + 1000:
+                self._rewrite()
+
+    def version(self):
+        """Session count and newest updated_at: changes with every save"""
+        with self.lock:
+            return f"{len(self.summaries)}-{self.latest}"
+
+    def _rewrite(self):
+        atomic_write(self.path, "".join(json.dumps(summary) + "\n" for summary in self.summaries.values()))
+        self.lines = len(self.summaries)
+
+    def page(self, limit, cursor=None, platform=None, topic_prefix=None):
+        """Newest-first page of summaries after cursor"""
+        with self.lock:
+            end = len(self.keys)
+            if cursor:
+                end = bisect.bisect_left(self.keys, decode_cursor(cursor))
+
+            page = []
+            i = end - 1
+            while i >= 0 and len(page) < limit:
+                summary = self.summaries[self.keys[i][1]]
+                if _matches(summary, platform, topic_prefix):
+                    page.append(summary)
+                i -= 1
+
+            has_more = i >= 0 and len(page) == limit
+            return page, has_more
+
+class JSONFileBackend:
+    """One pretty-printed JSON file per session"""
+    def __init__(self, data_dir, with_index=True, fsync=False):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(exist_ok=True)
+        self.fsync = fsync
+        self.index = None
+        if with_index:
+            self.index = SessionIndex(self.data_dir / "sessions.idx")
+            self.index.load(self.load_all)
+
+    def save(self, session_id, data):
+        self.save_many([(session_id, data)])
+
+    def save_many(self, items):
+        for session_id, data in items:
+            session_file = self.data_dir / f"{session_id}.json"
+            atomic_write(session_file, json.dumps(data, indent=2), self.fsync)
+        if self.index:
+            self.index.update_many([make_summary(session_id, data) for session_id, data in items])
+
+    def load(self, session_id):
+        session_file = self.data_dir / f"{session_id}.json"
+        if session_file.exists():
+            with open(session_file, 'r') as f:
+                return json.load(f)
+        return None
+
+    def load_all(self):
+        return dict(self.iter_all())
+
+    def iter_all(self):
+        """(session_id, data) for every session, one file at a time"""
+        for session_file in self.data_dir.glob("*.json"):
+            try:
+                with open(session_file, 'r') as f:
+                    data = json.load(f)
+            except (json.JSONDecodeError, FileNotFoundError):
+                continue
+            yield session_file.stem, data
+
+    def version(self, session_id):
+        """updated_at from the summary index ("" if unset), or None if there is no such session"""
+        summary = self.index.summaries.get(session_id) if self.index else None
+        if summary is not None:
+            return summary[6]
+        data = None if self.index else self.load(session_id)
+        return (data.get("updated_at") or "") if data is not None else None
+
+    def list_summaries(self, limit, cursor=None, platform=None, topic_prefix=None):
+        return self.index.page(limit, cursor, platform, topic_prefix)
+
+    def list_version(self):
+        """Version of the listing served from the summary index"""
+        return self.index.version()
+
+    def close(self):
+        pass
+
+class SQLiteBackend:
+    """Sessions in a SQLite database (WAL mode) with indexed metadata columns"""
+    def __init__(self, db_path, data_dir, fsync=False):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(f"PRAGMA synchronous={'FULL' if fsync else 'NORMAL'}")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                platform TEXT,
+                topic TEXT,
+                audience TEXT,
+                tone TEXT,
+                created_at TEXT,
+                updated_at TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_sessions_platform ON sessions(platform);
+            CREATE INDEX IF NOT EXISTS idx_sessions_created_at ON sessions(created_at);
+            CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions(updated_at);
+            CREATE INDEX IF NOT EXISTS idx_sessions_listing ON sessions(created_at, session_id);
+            CREATE INDEX IF NOT EXISTS idx_sessions_platform_listing ON sessions(platform, created_at, session_id);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        # Rows written before listing existed may have NULL timestamps
+        self.db.execute("UPDATE sessions SET created_at = '' WHERE created_at IS NULL")
+        self.db.execute("UPDATE sessions SET updated_at = '' WHERE updated_at IS NULL")
+        self.db.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('saves', 0)")
+        self.db.commit()
+        self.migrate_from_json(data_dir)
+
+    @staticmethod
+    def _row(session_id, data):
+        return (
+            session_id,
+            data.get("platform"),
+            data.get("topic"),
+            data.get("audience"),
+            data.get("tone"),
+            data.get("created_at") or "",
+            data.get("updated_at") or "",
+            json.dumps(data)
+        )
+
+    def save(self, session_id, data):
+        self.save_many([(session_id, data)])
+
+    def save_many(self, items):
+        rows = [self._row(session_id, data) for session_id, data in items]
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self.db.execute("UPDATE meta SET value = value + ? WHERE key = 'saves'", (len(rows),))
+            self.db.commit()
+
+    def load(self, session_id):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT data FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def version(self, session_id):
+        """updated_at column only (the session JSON is not read), or None"""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT updated_at FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return (row[0] or "") if row else None
+
+    def list_version(self):
+        """Save counter and newest updated_at, both read from the database so every worker agrees"""
+        with self.lock:
+            saves, latest = self.db.execute(
+                "SELECT (SELECT value FROM meta WHERE key = 'saves'), (SELECT MAX(updated_at) FROM sessions)"
+            ).fetchone()
+        return f"{saves}-{latest or ''}"
+
+    def load_all(self):
+        with self.lock:
+            rows = self.db.execute("SELECT session_id, data FROM sessions").fetchall()
+        return {session_id: json.loads(data) for session_id, data in rows}
+
+    def iter_all(self, batch_size=1000):
+        """(session_id, data) for every session, read in batches so writers are not held up"""
+        after = ""
+        while True:
+            with self.lock:
+                rows = self.db.execute(
+                    "SELECT session_id, data FROM sessions WHERE session_id > ? ORDER BY session_id LIMIT ?",
+                    (after, batch_size)
+                ).fetchall()
+            for session_id, data in rows:
+                yield session_id, json.loads(data)
+            if len(rows) < batch_size:
+                return
+            after = rows[-1][0]
+
+    def list_summaries(self, limit, cursor=None, platform=None, topic_prefix=None):
+        """Newest-first page read from the indexed columns only"""
+        where = []
+        params = []
+        if cursor:
+            where.append("(created_at, session_id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+        if platform:
+            where.append("platform = ?")
+            params.append(platform)
+        if topic_prefix:
+            escaped = topic_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            where.append("topic LIKE ? ESCAPE '\\'")
+            params.append(escaped + "%")
+
+        sql = f"SELECT {', '.join(SUMMARY_FIELDS)} FROM sessions"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, session_id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self.lock:
+            rows = self.db.execute(sql, params).fetchall()
+        return rows[:limit], len(rows) > limit
+
+    def migrate_from_json(self, data_dir):
+        """One-shot import of sessions saved by the JSON file backend"""
+        with self.lock:
+            done = self.db.execute(
+                "SELECT value FROM meta WHERE key = 'json_migrated'"
+            ).fetchone()
+            if done:
+                return
+
+            rows = []
+            for session_id, data in JSONFileBackend(data_dir, with_index=False).load_all().items():
+                rows.append(self._row(session_id, data))
+
+            # Existing rows win, the JSON files may be older copies
+            self.db.executemany(
+                "INSERT OR IGNORE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self.db.execute(
+                "INSERT INTO meta (key, value) VALUES ('json_migrated', ?)",
+                (datetime.now().isoformat(),)
+            )
+            self.db.commit()
+
+        if rows:
+            print(f"Migrated {len(rows)} JSON sessions into {STORAGE_PATH}")
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+class SessionRecord:
+    """Compact cached session: slotted fields, interned platform/tone, content kept as JSON text"""
+    __slots__ = ("session_id", "platform", "topic", "audience", "tone",
+                 "created_at", "updated_at", "content", "extra", "size")
+
+    FIELDS = ("session_id", "platform", "topic", "audience", "tone", "created_at", "updated_at")
+    # Rough per-record cost of the object, its slots and the small strings
+    OVERHEAD = 240
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls()
+        record.session_id = data.get("session_id")
+        record.platform = _intern(data.get("platform"))
+        record.topic = data.get("topic")
+        record.audience = data.get("audience")
+        record.tone = _intern(data.get("tone"))
+        record.created_at = data.get("created_at")
+        record.updated_at = data.get("updated_at")
+        record.content = json.dumps(data.get("content"), separators=(",", ":"))
+        extra = {k: v for k, v in data.items() if k not in cls.FIELDS and k != "content"}
+        record.extra = json.dumps(extra, separators=(",", ":")) if extra else None
+        record.size = cls.OVERHEAD + len(record.content) + len(record.extra or "") + sum(
+            len(value) for value in (record.topic, record.audience, record.created_at, record.updated_at)
+            if isinstance(value, str)
+        )
+        return record
+
+    def to_dict(self):
+        data = {field: getattr(self, field) for field in self.FIELDS if getattr(self, field) is not None}
+        data["content"] = json.loads(self.content)
+        if self.extra:
+            data.update(json.loads(self.extra))
+        return data
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+class SessionCache:
+    """LRU cache of SessionRecords bounded by entry count and approximate bytes.
+
+    Every save also goes to the backend (or the write-behind queue), so an
+    evicted session is simply reloaded from there on its next access.
+    """
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.records = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, session_id):
+        with self.lock:
+            record = self.records.get(session_id)
+            if record is None:
+                self.misses += 1
+                return None
+            self.records.move_to_end(session_id)
+            self.hits += 1
+        return record.to_dict()
+
+    def version(self, session_id):
+        """updated_at of a cached session without decoding it, or None if not cached"""
+        with self.lock:
+            record = self.records.get(session_id)
+        return None if record is None else (record.updated_at or "")
+
+    def put(self, session_id, data):
+        record = SessionRecord.from_dict(data)
+        with self.lock:
+            old = self.records.pop(session_id, None)
+            if old is not None:
+                self.bytes -= old.size
+            self.records[session_id] = record
+            self.bytes += record.size
+
+            # Keep at least the entry just added
+            while len(self.records) > 1 and (
+                len(self.records) > self.max_entries or self.bytes > self.max_bytes
+            ):
+                _, evicted = self.records.popitem(last=False)
+                self.bytes -= evicted.size
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.records),
+                "bytes": self.bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+class ConversationLog:
+    """Append-only JSONL log of chat messages, one file per session.
+
+    A turn appends only its new messages, reads can take just the last N
+    lines from the end of the file, and a log that grows past
+    compact_bytes is rewritten with its last messages: at most
+    keep_messages of them and half of compact_bytes, so it has room to
+    grow again before the next rewrite.
+    """
+    def __init__(self, log_dir, compact_bytes, keep_messages):
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.compact_bytes = compact_bytes
+        self.keep_messages = keep_messages
+        self.lock = threading.Lock()
+
+    def _path(self, session_id):
+        return self.log_dir / f"{session_id}.jsonl"
+
+    def append(self, session_id, messages):
+        lines = "".join(json.dumps(message) + "\n" for message in messages)
+        path = self._path(session_id)
+        with self.lock:
+            with open(path, 'a') as f:
+                f.write(lines)
+                size = f.tell()
+            if size > self.compact_bytes:
+                self._compact(path)
+
+    def replace(self, session_id, messages):
+        path = self._path(session_id)
+        with self.lock:
+            self._write(path, [json.dumps(message) for message in messages])
+
+    def read(self, session_id, last_n=None):
+        path = self._path(session_id)
+        if not path.exists():
+            return []
+        if last_n is None:
+            with open(path, 'r') as f:
+                lines = f.read().splitlines()
+        else:
+            lines = self._tail(path, last_n)
+        return [json.loads(line) for line in lines if line.strip()]
+
+    @staticmethod
+    def _tail(path, n, block_size=8192):
+        """Last n lines, reading backwards from the end of the file"""
+        if n <= 0:
+            return []
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            data = b""
+            # One extra newline guarantees the first kept line is whole
+            while pos > 0 and data.count(b"\n") <= n:
+                read_size = min(block_size, pos)
+                pos -= read_size
+                f.seek(pos)
+                data = f.read(read_size) + data
+        return [line.decode("utf-8") for line in data.splitlines()[-n:]]
+
+    def _compact(self, path):
+        lines = self._tail(path, self.keep_messages)
+        budget = self.compact_bytes // 2
+        kept = 0
+        size = 0
+        for line in reversed(lines):
+            size += len(line.encode("utf-8")) + 1
+            # The newest message is kept even if it alone is over budget
+            if size > budget and kept:
+                break
+            kept += 1
+        self._write(path, lines[len(lines) - kept:])
+
+    @staticmethod
+    def _write(path, lines):
+        atomic_write(path, "".join(line + "\n" for line in lines))
+
+class WriteBehindQueue:
+    """Background writer that persists sessions in batches.
+
+    put() only records the latest data per session, so repeated saves of
+    the same session before a flush are merged into one write. A daemon
+    thread flushes up to batch_size sessions per backend call; close()
+    drains whatever is left.
+    """
+    def __init__(self, backend, flush_interval, batch_size):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.cond = threading.Condition()
+        self.pending = {}
+        self.inflight = {}
+        self.closed = False
+
+        self.enqueued = 0
+        self.coalesced = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.errors = 0
+        self.flush_ms_total = 0.0
+        self.flush_ms_max = 0.0
+        self.last_flush_ms = None
+
+        self.thread = threading.Thread(target=self._run, name="storage-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def put(self, session_id, data):
+        with self.cond:
+            if not self.closed:
+                if session_id in self.pending:
+                    self.coalesced += 1
+                self.pending[session_id] = data
+                self.enqueued += 1
+                self.cond.notify()
+                return
+
+        # The writer has stopped (shutdown), write through
+        self.backend.save(session_id, data)
+
+    def get(self, session_id):
+        """Data not yet written to the backend, or None"""
+        with self.cond:
+            if session_id in self.pending:
+                return self.pending[session_id]
+            return self.inflight.get(session_id)
+
+    def unflushed(self):
+        """All (session_id, data) not yet written to the backend"""
+        with self.cond:
+            return {**self.inflight, **self.pending}
+
+    def _take_batch(self):
+        with self.cond:
+            while not self.pending and not self.closed:
+                self.cond.wait()
+            # Give concurrent saves a moment to join (and merge into) this batch
+            deadline = time.monotonic() + self.flush_interval
+            while not self.closed and len(self.pending) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+            batch = []
+            for session_id in list(self.pending)[:self.batch_size]:
+                batch.append((session_id, self.pending.pop(session_id)))
+            self.inflight = dict(batch)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+
+            started = time.perf_counter()
+            try:
+                self.backend.save_many(batch)
+            except Exception as e:
+                print(f"Write-behind flush failed: {e}")
+                with self.cond:
+                    self.errors += 1
+                    for session_id, data in batch:
+                        self.pending.setdefault(session_id, data)
+                    self.inflight = {}
+                    closed = self.closed
+                if closed:
+                    return
+                time.sleep(self.flush_interval)
+                continue
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            STORAGE_WRITE_LATENCY.labels("write_behind").observe(elapsed_ms / 1000)
+            with self.cond:
+                self.inflight = {}
+                self.flushed += len(batch)
+                self.flushes += 1
+                self.flush_ms_total += elapsed_ms
+                self.flush_ms_max = max(self.flush_ms_max, elapsed_ms)
+                self.last_flush_ms = elapsed_ms
+                self.cond.notify_all()
+
+    def close(self):
+        """Flush everything still queued and stop the writer"""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join()
+
+    def stats(self):
+        with self.cond:
+            return {
+                "queue_depth": len(self.pending) + len(self.inflight),
+                "enqueued": self.enqueued,
+                "coalesced": self.coalesced,
+                "flushed": self.flushed,
+                "flushes": self.flushes,
+                "errors": self.errors,
+                "avg_flush_ms": self.flush_ms_total / self.flushes if self.flushes else 0.0,
+                "max_flush_ms": self.flush_ms_max,
+                "last_flush_ms": self.last_flush_ms
+            }
+
+def create_backend(name, data_dir):
+    """Build the configured session backend"""
+    if name == "json":
+        return JSONFileBackend(data_dir, fsync=STORAGE_FSYNC)
+    if name == "sqlite":
+        return SQLiteBackend(STORAGE_PATH, data_dir, fsync=STORAGE_FSYNC)
+    raise Exception(f"Unknown STORAGE_BACKEND: {name}")
 
 class SimpleStorage:
-    def __init__(self):
+    def __init__(self, backend=None, write_behind=STORAGE_WRITE_BEHIND):
         self.data_dir = Path("data")
         self.data_dir.mkdir(exist_ok=True)
-        self.sessions = {}
-        self.conversations = {}
-    
+        self.backend = backend or create_backend(STORAGE_BACKEND, self.data_dir)
+        self.writer = None
+        if write_behind:
+            self.writer = WriteBehindQueue(self.backend, STORAGE_FLUSH_INTERVAL, STORAGE_FLUSH_BATCH)
+        self.sessions = SessionCache(SESSION_CACHE_MAX_ENTRIES, SESSION_CACHE_MAX_BYTES)
+        self.search = None
+        if SEARCH_ENABLED:
+            self.search = SearchIndex(SEARCH_INDEX_PATH, SEARCH_PREFIX_TERMS)
+            # Built or loaded in the background; /search answers 503 until then
+            self.search.start(self.backend.iter_all)
+        self.conversations = ConversationLog(
+            self.data_dir / "conversations",
+            CONVERSATION_COMPACT_BYTES,
+            CONVERSATION_KEEP_MESSAGES
+        )
+
     def save_session(self, session_id, data):
         """Save session data"""
-        self.sessions[session_id] = {
+        record = {
             **data,
             "updated_at": datetime.now().isoformat()
         }
-        
-        # Also save to file for persistence
-        session_file = self.data_dir / f"{session_id}.json"
-        with open(session_file, 'w') as f:
-            json.dump(self.sessions[session_id], f, indent=2)
-    
+        self.sessions.put(session_id, record)
+
+        # Also save to the backend for persistence
+        if self.writer:
+            self.writer.put(session_id, record)
+        else:
+            with STORAGE_WRITE_LATENCY.labels("sync").time():
+                self.backend.save(session_id, record)
+        if self.search:
+            self.search.add(session_id, record)
+
     def get_session(self, session_id):
         """Get session data"""
-        if session_id in self.sessions:
-            return self.sessions[session_id]
-        
-        # Try loading from file
-        session_file = self.data_dir / f"{session_id}.json"
-        if session_file.exists():
-            with open(session_file, 'r') as f:
-                data = json.load(f)
-                self.sessions[session_id] = data
-                return data
-        
+        data = self.sessions.get(session_id)
+        if data is not None:
+            return data
+
+        # Try loading from the backend
+        data = self.writer.get(session_id) if self.writer else None
+        if data is not None:
+            data = dict(data)
+        else:
+            data = self.backend.load(session_id)
+        if data is not None:
+            self.sessions.put(session_id, data)
+            return data
+
         return None
-    
+
+    def session_version(self, session_id):
+        """A session's updated_at without loading its content, or None if it doesn't exist"""
+        data = self.writer.get(session_id) if self.writer else None
+        if data is not None:
+            return data.get("updated_at") or ""
+        version = self.sessions.version(session_id)
+        if version is not None:
+            return version
+        return self.backend.version(session_id)
+
+    def list_version(self):
+        """Changes whenever any session is saved, by any worker sharing the backend (listing ETags)"""
+        # Queued first: a flush in between then shows up in both parts rather than in neither
+        unflushed = self.writer.unflushed() if self.writer else None
+        version = self.backend.list_version()
+        if unflushed:
+            # Listed by this process before they reach the backend
+            version += f"+{len(unflushed)}-{max(data.get('updated_at') or '' for data in unflushed.values())}"
+        return version
+
+    def append_conversation(self, session_id, messages):
+        """Append new conversation messages (only the messages of this turn)"""
+        self.conversations.append(session_id, messages)
+
     def save_conversation(self, session_id, messages):
-        """Save conversation messages"""
-        self.conversations[session_id] = messages
-    
-    def get_conversation(self, session_id):
-        """Get conversation messages"""
-        return self.conversations.get(session_id, [])
-    
+        """Replace the whole conversation (prefer append_conversation)"""
+        self.conversations.replace(session_id, messages)
+
+    def get_conversation(self, session_id, last_n=None):
+        """Get conversation messages, or only the last_n most recent"""
+        return self.conversations.read(session_id, last_n)
+
     def get_all_sessions(self):
         """Get all sessions"""
-        # Load all session files from disk
-        all_sessions = {}
-        
-        for session_file in self.data_dir.glob("*.json"):
-            session_id = session_file.stem
-            try:
-                with open(session_file, 'r') as f:
-                    data = json.load(f)
-                    all_sessions[session_id] = data
-            except (json.JSONDecodeError, FileNotFoundError):
-                continue
-        
-        # Merge with in-memory sessions
-        all_sessions.update(self.sessions)
-        
+        # Load all sessions from the backend
+        all_sessions = self.backend.load_all()
+
+        # Merge with queued sessions (cached ones are never newer than these)
+        if self.writer:
+            all_sessions.update(self.writer.unflushed())
+
         return all_sessions
 
+    def list_sessions(self, limit=50, cursor=None, platform=None, topic_prefix=None):
+        """Newest-first page of session summaries, served from the summary index"""
+        summaries, has_more = self.backend.list_summaries(limit, cursor, platform, topic_prefix)
+
+        if self.writer:
+            summaries, has_more = self._merge_unflushed(
+                summaries, has_more, limit, cursor, platform, topic_prefix
+            )
+
+        next_cursor = None
+        if has_more and summaries:
+            last = summaries[-1]
+            next_cursor = encode_cursor(last[5], last[0])
+        return {
+            "sessions": [dict(zip(SUMMARY_FIELDS, summary)) for summary in summaries],
+            "next_cursor": next_cursor
+        }
+
+    def _merge_unflushed(self, summaries, has_more, limit, cursor, platform, topic_prefix):
+        """Add sessions still in the write-behind queue to a page"""
+        after = decode_cursor(cursor) if cursor else None
+        queued = {}
+        for session_id, data in self.writer.unflushed().items():
+            summary = make_summary(session_id, data)
+            if after and (summary[5], summary[0]) >= after:
+                continue
+            if _matches(summary, platform, topic_prefix):
+                queued[session_id] = summary
+        if not queued:
+            return summaries, has_more
+
+        merged = [s for s in summaries if s[0] not in queued] + list(queued.values())
+        merged.sort(key=lambda s: (s[5], s[0]), reverse=True)
+        return merged[:limit], has_more or len(merged) > limit
+
+    def search_sessions(self, query, limit=20, offset=0, platform=None):
+        """Ranked page of sessions matching query, served from the search index"""
+        if not self.search:
+            raise Exception("Search is disabled (SEARCH_ENABLED=false)")
+        return self.search.search(query, limit, offset, platform)
+
+    def stats(self):
+        """Session cache counters, search index size, write-behind queue depth and flush latency"""
+        stats = {"session_cache": self.sessions.stats(), "write_behind": bool(self.writer)}
+        if self.search:
+            stats["search"] = self.search.stats()
+        if self.writer:
+            stats.update(self.writer.stats())
+        return stats
+
+    def close(self):
+        """Drain queued writes and release the backend (call on shutdown)"""
+        if self.writer:
+            self.writer.close()
+        if self.search:
+            self.search.close()
+        self.backend.close()
+
 # Global storage instance
-storage = SimpleStorage()
\ No newline at end of file
+storage = SimpleStorage()